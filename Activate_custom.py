@@ -14,19 +14,40 @@
 # ----------------------------------------------------------------------
 """Performs repository-specific activation activities."""
 
+import importlib.util
 import os
 import sys
 
-sys.path.insert(0, os.getenv("DEVELOPMENT_ENVIRONMENT_FUNDAMENTAL"))
-from RepositoryBootstrap.SetupAndActivate import CommonEnvironment, CurrentShell
-from RepositoryBootstrap.SetupAndActivate import DynamicPluginArchitecture
-del sys.path[0]
+from functools import lru_cache
+
+# Load the RepositoryBootstrap package directly from its known location rather than
+# temporarily adding the fundamental repository to sys.path and searching for it. Its
+# submodules are then resolved relative to the package.
+if "RepositoryBootstrap" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location(
+        "RepositoryBootstrap",
+        os.path.join(
+            os.getenv("DEVELOPMENT_ENVIRONMENT_FUNDAMENTAL"),
+            "RepositoryBootstrap",
+            "__init__.py",
+        ),
+    )
+
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules[_spec.name] = _module
+    _spec.loader.exec_module(_module)
+
+    del _module
+    del _spec
 
 # ----------------------------------------------------------------------
-_script_fullpath                            = CommonEnvironment.ThisFullpath()
+_script_fullpath                            = os.path.realpath(__file__)
 _script_dir, _script_name                   = os.path.split(_script_fullpath)
 # ----------------------------------------------------------------------
 
+_SIMPLE_SCHEMA_PLUGIN_DIR                   = os.path.join(_script_dir, "Scripts", "SimpleSchemaGenerator")
+_SIMPLE_SCHEMA_REPOSITORY_ID                = "5C7E1B3369B74BC098141FAD290288DA"
+
 # <Class '<name>' has no '<attr>' member> pylint: disable = E1101
 # <Unrearchable code> pylint: disable = W0101
 # <Unused argument> pylint: disable = W0613
@@ -52,97 +73,70 @@ def GetCustomActions(
     cases, this is Bash on Linux systems and Batch or PowerShell on Windows systems.
     """
 
+    if configuration != "SimpleSchema":
+        return []
+
     actions = []
 
-    if configuration == "SimpleSchema":
-        for repository in repositories:
-            if repository.Id == "5C7E1B3369B74BC098141FAD290288DA":
-                actions.append(
-                    CurrentShell.Commands.Set(
-                        "DEVELOPMENT_ENVIRONMENT_SIMPLE_SCHEMA_ROOT_DIR",
-                        repository.Root,
-                    ),
-                )
-                break
-
-        actions += DynamicPluginArchitecture.CreateRegistrationStatements(
-            "DEVELOPMENT_ENVIRONMENT_SIMPLE_SCHEMA_PLUGINS",
-            os.path.join(_script_dir, "Scripts", "SimpleSchemaGenerator"),
-            lambda fullpath, name, ext: ext == ".py" and name.endswith("Plugin"),
-        )
+    for repository in repositories:
+        if repository.Id == _SIMPLE_SCHEMA_REPOSITORY_ID:
+            actions.append(
+                _GetCurrentShell().Commands.Set(
+                    "DEVELOPMENT_ENVIRONMENT_SIMPLE_SCHEMA_ROOT_DIR",
+                    repository.Root,
+                ),
+            )
+            break
+
+    actions += _CreatePluginRegistrationStatements(_SIMPLE_SCHEMA_PLUGIN_DIR)
 
     return actions
 
 
 # ----------------------------------------------------------------------
-def GetCustomActionsEpilogue(
-    output_stream,
-    configuration,
-    version_specs,
-    generated_dir,
-    debug,
-    verbose,
-    fast,
-    repositories,
-    is_mixin_repo,
-):
-    """
-    Returns an action or list of actions that should be invoked as part of the activation process. Note
-    that this is called after `GetCustomActions` has been called for each repository in the dependency
-    list.
-
-    ****************************************************
-    Note that it is very rare to have the need to implement
-    this method. In most cases, it is safe to delete it.
-    ****************************************************
-
-    Actions are generic command line statements defined in
-    <Common_Environment>/Libraries/Python/CommonEnvironment/v1.0/CommonEnvironment/Shell/Commands/__init__.py
-    that are converted into statements appropriate for the current scripting language (in most
-    cases, this is Bash on Linux systems and Batch or PowerShell on Windows systems.
-    """
-
-    return []
-
-
 # ----------------------------------------------------------------------
-def GetCustomScriptExtractors():
-    """
-    Returns information that can be used to enumerate, extract, and generate documentation
-    for scripts stored in the Scripts directory in this repository and all repositories
-    that depend upon it.
+# ----------------------------------------------------------------------
+@lru_cache(maxsize=None)
+def _GetCurrentShell():
+    """Imports the current shell on first use, as it is only needed when commands are emitted"""
 
-    ****************************************************
-    Note that it is very rare to have the need to implement
-    this method. In most cases, it is safe to delete it.
-    ****************************************************
+    from RepositoryBootstrap.SetupAndActivate import CurrentShell
 
-    There concepts are used with custom script extractors:
+    return CurrentShell
 
-        - DirGenerator:             Method to enumerate sub-directories when searching for scripts in a
-                                    repository's Scripts directory.
 
-                                        def Func(directory, version_sepcs) -> [ (subdir, should_recurse), ... ]
-                                                                              [ subdir, ... ]
-                                                                              (subdir, should_recurse)
-                                                                              subdir
+# ----------------------------------------------------------------------
+def _CreatePluginRegistrationStatements(plugin_dir):
+    """Returns the statements that register the plugins found in `plugin_dir`"""
 
-        - CreateCommands:           Method that creates the shell commands to invoke a script.
+    plugin_filenames = list(_EnumeratePluginFilenames(plugin_dir))
+    if not plugin_filenames:
+        return []
 
-                                        def Func(script_filename) -> [ command, ...]
-                                                                     command
-                                                                     None           # Indicates not supported
+    # All plugins are registered by a single statement; Augment (rather than Set) preserves
+    # the plugins registered by other repositories.
+    return [
+        _GetCurrentShell().Commands.Augment(
+            "DEVELOPMENT_ENVIRONMENT_SIMPLE_SCHEMA_PLUGINS",
+            plugin_filenames,
+        ),
+    ]
 
-        - CreateDocumentation:      Method that extracts documentation from a script.
 
-                                        def Func(script_filename) -> documentation string
+# ----------------------------------------------------------------------
+def _EnumeratePluginFilenames(plugin_dir):
+    """Yields all of the `*Plugin.py` files found in `plugin_dir` and its descendants"""
 
-        - ScriptNameDecorator:      Returns a new name for the script.
+    dirs = [plugin_dir]
 
-                                        def Func(script_filename) -> name string
+    while dirs:
+        this_dir = dirs.pop()
 
-    See <Common_Environment>/Activate_custom.py for an example of how script extractors
-    are used to process Python and PowerShell scripts.
-    """
+        if not os.path.isdir(this_dir):
+            continue
 
-    return
+        for item in sorted(os.scandir(this_dir), key=lambda item: item.name):
+            if item.is_dir(follow_symlinks=False):
+                dirs.append(item.path)
+            elif item.name.endswith("Plugin.py") and item.is_file(follow_symlinks=False):
+                yield item.path
@@ -21,8 +21,13 @@ import textwrap
 
 from collections import OrderedDict
 
-import rtyaml
-import six
+import yaml
+
+# The C implementation is used when libyaml is available
+try:
+    from yaml import CSafeDumper as _YamlDumperBase
+except ImportError:
+    from yaml import SafeDumper as _YamlDumperBase
 
 import CommonEnvironment
 from CommonEnvironment import Interface
@@ -46,6 +51,55 @@ _script_fullpath                            = CommonEnvironment.ThisFullpath()
 _script_dir, _script_name                   = os.path.split(_script_fullpath)
 # ----------------------------------------------------------------------
 
+_OUTPUT_BUFFER_SIZE                         = 1024 * 1024
+_OPTIONAL_ARITY                             = Arity.FromString("?")
+
+_IDENTITIES_TEMPLATE                        = textwrap.dedent(
+    """\
+    <__identities__>:
+        {}""",
+)
+
+_ITEMS_TEMPLATE                             = textwrap.dedent(
+    """\
+    <__items__>:
+        {}""",
+)
+
+_MUTABLE_ITEMS_TEMPLATE                     = textwrap.dedent(
+    """\
+    <__mutable_items__>:
+        {}""",
+)
+
+_REFERENCES_TEMPLATE                        = textwrap.dedent(
+    """\
+    <__references__>:
+        {}""",
+)
+
+_BACKREFS_TEMPLATE                          = textwrap.dedent(
+    """\
+    <__backrefs__>:
+        {}""",
+)
+
+# Content for sections without any items
+_EMPTY_IDENTITIES_CONTENT                   = _IDENTITIES_TEMPLATE.format("pass")
+_EMPTY_ITEMS_CONTENT                        = _ITEMS_TEMPLATE.format("pass")
+_EMPTY_MUTABLE_ITEMS_CONTENT                = _MUTABLE_ITEMS_TEMPLATE.format("pass")
+_EMPTY_REFERENCES_CONTENT                   = _REFERENCES_TEMPLATE.format("pass")
+_EMPTY_BACKREFS_CONTENT                     = _BACKREFS_TEMPLATE.format("pass")
+
+_METADATA_TEMPLATE                          = textwrap.dedent(
+    """\
+    (__metadata_{}):
+        {}
+
+    """,
+)
+
+
 # ----------------------------------------------------------------------
 @Interface.staticderived
 class Plugin(RelationalPluginImpl):
@@ -91,157 +145,122 @@ class Plugin(RelationalPluginImpl):
     ):
         status_stream.write("Writing '{}'...".format(output_filenames[0]))
         with status_stream.DoneManager():
-            with open(output_filenames[0], "w") as f:
+            # The YAML content is written in many small pieces, so use a large buffer
+            with open(output_filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                 f.write(
                     cls._GenerateFileHeader(
                         prefix="# ",
                     ),
                 )
 
-                # ----------------------------------------------------------------------
-                @Interface.staticderived
-                class ChildVisitor(ChildVisitorBase):
-                    # ----------------------------------------------------------------------
-                    def __init__(self):
-                        self.identities     = OrderedDict()
-                        self.items          = OrderedDict()
-                        self.update_items   = OrderedDict()
-                        self.references     = OrderedDict()
-                        self.backrefs       = OrderedDict()
-
-                    # ----------------------------------------------------------------------
-                    @Interface.override
-                    def OnIdentity(self, item):
-                        self.identities[item.Name] = item
-
-                    # ----------------------------------------------------------------------
-                    @Interface.override
-                    def OnFundamental(self, item):
-                        self.items[item.Name] = item
-
-                        if item.IsMutable:
-                            # Optional values and strings (because empty strings aren't valid)
-                            # need additional information in order to support scenarios where
-                            # the value should be reset.
-                            if item.TypeInfo.Arity.IsOptional or isinstance(item.TypeInfo, StringTypeInfo):
-                                self.update_items["_{}_reset_value".format(item.Name)] = BoolTypeInfo(
-                                    arity=Arity.FromString("?"),
-                                )
-
-                            type_info = copy.deepcopy(item.TypeInfo)
-
-                            type_info.Arity = Arity.FromString("?")
+                # Objects are referenced by many items, so the id of every object is validated
+                # and its type info looked up once (the objects are alive for the duration of
+                # this method).
+                id_type_infos = {}
 
-                            self.update_items[item.Name] = type_info
-
-                    # ----------------------------------------------------------------------
-                    @Interface.override
-                    def OnReference(self, item):
-                        self.references[item.ReferenceName]= item
+                for obj in cls.AllObjects:
+                    assert obj.children
+                    assert obj.children[0].Name == "id", obj.children[0].Name
 
-                    # ----------------------------------------------------------------------
-                    @Interface.override
-                    def OnBackref(self, item):
-                        self.backrefs[item.BackrefName] = item
+                    id_type_infos[id(obj)] = obj.children[0].Item.TypeInfo
 
                 # ----------------------------------------------------------------------
                 def GetReferenceIdTypeInfo(item):
                     """Returns the type info for a reference id"""
 
-                    assert item.ReferencedObject.children
-                    assert item.ReferencedObject.children[0].Name == "id", item.ReferencedObject.children[0].Name
-
-                    return item.ReferencedObject.children[0].Item.TypeInfo
+                    return id_type_infos[id(item.ReferencedObject)]
 
                 # ----------------------------------------------------------------------
                 def GetBackrefIdTypeInfo(item):
                     """Returns the type info for a backref id"""
 
-                    assert item.ReferencingObject.children
-                    assert item.ReferencingObject.children[0].Name == "id", item.ReferencingObject.children[0].Name
-
-                    return item.ReferencingObject.children[0].Item.TypeInfo
+                    return id_type_infos[id(item.ReferencingObject)]
 
                 # ----------------------------------------------------------------------
 
                 # Write the SimpleSchema content for all types
                 simple_schema_visitor = SimpleSchemaVisitor()
+                simple_schema_cache = {}
+
+                # ----------------------------------------------------------------------
+                def ToSimpleSchema(type_info, name):
+                    """Returns the SimpleSchema content for the type info, reusing previously generated content when possible"""
+
+                    # The type info is stored alongside the content so that its id can't be recycled
+                    # while the cache is alive.
+                    key = (id(type_info), name)
+
+                    cache_value = simple_schema_cache.get(key, None)
+                    if cache_value is None:
+                        cache_value = (type_info, simple_schema_visitor.Accept(type_info, name))
+                        simple_schema_cache[key] = cache_value
+
+                    return cache_value[1]
+
+                # ----------------------------------------------------------------------
 
                 simple_schemas = []
                 endpoints = []
                 endpoint_lookup = {}
 
                 for obj in cls.AllObjects:
-                    child_visitor = ChildVisitor()
+                    child_visitor = _ChildVisitor()
                     child_visitor.Accept(obj)
 
+                    unique_name = obj.UniqueName
+                    singular_name = obj.SingularPascalName
+                    element = obj.Element
+
                     metadata_content = []
 
                     # Generate the identity metadata
-                    metadata_content.append(
-                        textwrap.dedent(
-                            """\
-                            <__identities__>:
-                                {}
-
-                            """,
-                        ).format(
-                            StringHelpers.LeftJustify(
-                                "\n".join(
-                                    [
-                                        simple_schema_visitor.Accept(item.TypeInfo, identity_name)
-                                        for identity_name, item in six.iteritems(child_visitor.identities)
-                                    ]
+                    if not child_visitor.identities:
+                        metadata_content.append(_EMPTY_IDENTITIES_CONTENT)
+                    else:
+                        metadata_content.append(
+                            _IDENTITIES_TEMPLATE.format(
+                                _Indent(
+                                    "\n".join(
+                                        ToSimpleSchema(item.TypeInfo, identity_name)
+                                        for identity_name, item in child_visitor.identities.items()
+                                    ),
                                 ),
-                                4,
                             ),
-                        ),
-                    )
+                        )
 
                     # Items
-                    metadata_content.append(
-                        textwrap.dedent(
-                            """\
-                            <__items__>:
-                                {}
-
-                            """,
-                        ).format(
-                            "pass" if not child_visitor.items else StringHelpers.LeftJustify(
-                                "\n".join(
-                                    [
-                                        simple_schema_visitor.Accept(item.TypeInfo, item_name)
-                                        for item_name, item in six.iteritems(child_visitor.items)
-                                    ]
+                    if not child_visitor.items:
+                        metadata_content.append(_EMPTY_ITEMS_CONTENT)
+                    else:
+                        metadata_content.append(
+                            _ITEMS_TEMPLATE.format(
+                                _Indent(
+                                    "\n".join(
+                                        ToSimpleSchema(item.TypeInfo, item_name)
+                                        for item_name, item in child_visitor.items.items()
+                                    ),
                                 ),
-                                4,
                             ),
-                        ),
-                    )
+                        )
 
                     # Update Items
-                    metadata_content.append(
-                        textwrap.dedent(
-                            """\
-                            <__mutable_items__>:
-                                {}
-
-                            """,
-                        ).format(
-                            "pass" if not child_visitor.update_items else StringHelpers.LeftJustify(
-                                "\n".join(
-                                    [
-                                        simple_schema_visitor.Accept(item_type_info, item_name)
-                                        for item_name, item_type_info in six.iteritems(child_visitor.update_items)
-                                    ]
+                    if not child_visitor.update_items:
+                        metadata_content.append(_EMPTY_MUTABLE_ITEMS_CONTENT)
+                    else:
+                        metadata_content.append(
+                            _MUTABLE_ITEMS_TEMPLATE.format(
+                                _Indent(
+                                    "\n".join(
+                                        ToSimpleSchema(item_type_info, item_name)
+                                        for item_name, item_type_info in child_visitor.update_items.items()
+                                    ),
                                 ),
-                                4,
                             ),
-                        ),
-                    )
+                        )
 
-                    # Generate the relationship structures
-                    reference_items = [(item_name, item) for item_name, item in six.iteritems(child_visitor.references) if not item.IsParentChild]
+                    # Generate the relationship structures. We don't need to include the parent/child
+                    # relationships, as those relationships are implied by the uri structure.
+                    reference_items = [(item_name, item) for item_name, item in child_visitor.references.items() if not item.IsParentChild]
 
                     # ----------------------------------------------------------------------
                     def GetReferenceArity(item):
@@ -257,31 +276,21 @@ class Plugin(RelationalPluginImpl):
 
                     # ----------------------------------------------------------------------
 
-                    metadata_content.append(
-                        textwrap.dedent(
-                            """\
-                            <__references__>:
-                                {}
-
-                            """,
-                        ).format(
-                            "pass" if not reference_items else StringHelpers.LeftJustify(
-                                "\n".join(
-                                    [
-                                        "<{} __metadata_{}{}>".format(
-                                            item_name,
-                                            item.ReferencedObject.UniqueName,
-                                            GetReferenceArity(item),
-                                        )
+                    if not reference_items:
+                        metadata_content.append(_EMPTY_REFERENCES_CONTENT)
+                    else:
+                        metadata_content.append(
+                            _REFERENCES_TEMPLATE.format(
+                                _Indent(
+                                    "\n".join(
+                                        f"<{item_name} __metadata_{item.ReferencedObject.UniqueName}{GetReferenceArity(item)}>"
                                         for item_name, item in reference_items
-                                    ]
+                                    ),
                                 ),
-                                4,
                             ),
-                        ),
-                    )
+                        )
 
-                    backref_items = [(item_name, item) for item_name, item in six.iteritems(child_visitor.backrefs) if not item.IsParentChild]
+                    backref_items = [(item_name, item) for item_name, item in child_visitor.backrefs.items() if not item.IsParentChild]
 
                     # ----------------------------------------------------------------------
                     def GetBackrefArity(item):
@@ -297,94 +306,76 @@ class Plugin(RelationalPluginImpl):
 
                     # ----------------------------------------------------------------------
 
-                    metadata_content.append(
-                        textwrap.dedent(
-                            """\
-                            <__backrefs__>:
-                                {}
-
-                            """,
-                        ).format(
-                            "pass" if not backref_items else StringHelpers.LeftJustify(
-                                "\n".join(
-                                    [
-                                        "<{} __metadata_{}{}>".format(
-                                            item_name,
-                                            item.ReferencingObject.UniqueName,
-                                            GetBackrefArity(item),
-                                        )
+                    if not backref_items:
+                        metadata_content.append(_EMPTY_BACKREFS_CONTENT)
+                    else:
+                        metadata_content.append(
+                            _BACKREFS_TEMPLATE.format(
+                                _Indent(
+                                    "\n".join(
+                                        f"<{item_name} __metadata_{item.ReferencingObject.UniqueName}{GetBackrefArity(item)}>"
                                         for item_name, item in backref_items
-                                    ]
+                                    ),
                                 ),
-                                4,
                             ),
-                        ),
-                    )
+                        )
 
                     # Finalize the types
                     simple_schemas.append(
-                        textwrap.dedent(
-                            """\
-                            (__metadata_{}):
-                                {}
-
-                            """,
-                        ).format(
-                            obj.UniqueName,
-                            StringHelpers.LeftJustify("".join(metadata_content).rstrip(), 4),
+                        _METADATA_TEMPLATE.format(
+                            unique_name,
+                            _Indent("\n\n".join(metadata_content)),
                         ),
                     )
 
                     # Generate the collection endpoint
-                    collection_endpoint = OrderedDict()
+                    collection_endpoint = {}
 
                     collection_endpoint["context"] = "HttpGeneratorRestPlugin::collection"
 
-                    if obj.Element.Parent is None:
+                    if element.Parent is None:
                         endpoints.append(collection_endpoint)
                         path_prefix = "/"
                     else:
-                        assert obj.Element.Parent.DottedName in endpoint_lookup, obj.Element.Parent.DottedName
-                        endpoint_lookup[obj.Element.Parent.DottedName].append(collection_endpoint)
+                        assert element.Parent.DottedName in endpoint_lookup, element.Parent.DottedName
+                        endpoint_lookup[element.Parent.DottedName].setdefault("children", []).append(collection_endpoint)
                         path_prefix = ""
 
-                    collection_endpoint["uri"] = "{}{}/".format(path_prefix, obj.PluralPascalName)
-                    collection_endpoint["group"] = obj.UniqueName
-                    collection_endpoint["summary"] = "Operations on a collection of '{}' items".format(obj.SingularPascalName)
+                    collection_endpoint["uri"] = f"{path_prefix}{obj.PluralPascalName}/"
+                    collection_endpoint["group"] = unique_name
+                    collection_endpoint["summary"] = f"Operations on a collection of '{singular_name}' items"
 
                     collection_endpoint["methods"] = [
                         {
                             "verb": "POST",
                             "summary": "CREATE",
-                            "description": "Creates a '{}' item".format(obj.SingularPascalName),
+                            "description": f"Creates a '{singular_name}' item",
                         },
                         {
                             "verb": "GET",
                             "summary": "ENUMERATE",
-                            "description": "Returns all '{}' items".format(obj.SingularPascalName),
+                            "description": f"Returns all '{singular_name}' items",
                         },
                     ]
 
-                    collection_endpoint["children"] = []
-
                     # Generate the item endpoint
-                    item_endpoint = OrderedDict()
+                    item_endpoint = {}
 
                     item_endpoint["context"] = "HttpGeneratorRestPlugin::collection_item"
 
-                    id_name = "{}_id".format(obj.SingularSnakeName)
+                    id_name = f"{obj.SingularSnakeName}_id"
 
-                    item_endpoint["uri"] = "{{{}}}/".format(id_name)
-                    item_endpoint["group"] = obj.UniqueName
-                    item_endpoint["summary"] = "Operations on a '{}' item".format(obj.SingularPascalName)
+                    item_endpoint["uri"] = f"{{{id_name}}}/"
+                    item_endpoint["group"] = unique_name
+                    item_endpoint["summary"] = f"Operations on a '{singular_name}' item"
 
-                    if obj.Element.description:
-                        item_endpoint["description"] = obj.Element.description
+                    if element.description:
+                        item_endpoint["description"] = element.description
 
                     item_endpoint["variables"] = [
                         {
                             "name" : id_name,
-                            "simple_schema" : simple_schema_visitor.Accept(child_visitor.identities["id"].TypeInfo, id_name),
+                            "simple_schema" : ToSimpleSchema(child_visitor.identities["id"].TypeInfo, id_name),
                         },
                     ]
 
@@ -392,13 +383,12 @@ class Plugin(RelationalPluginImpl):
                         {
                             "verb": "GET",
                             "summary": "READ",
-                            "description": "Returns a '{}' item".format(obj.SingularPascalName),
+                            "description": f"Returns a '{singular_name}' item",
                         },
                         {
                             "verb": "DELETE",
                             "summary": "DELETE",
-                            "description":
-                            "Deletes a '{}' item".format(obj.SingularPascalName),
+                            "description": f"Deletes a '{singular_name}' item",
                         },
                     ]
 
@@ -407,28 +397,31 @@ class Plugin(RelationalPluginImpl):
                             {
                                 "verb": "PATCH",
                                 "summary": "UPDATE",
-                                "description": "Updates a '{}' item".format(obj.SingularPascalName),
+                                "description": f"Updates a '{singular_name}' item",
                             },
                         )
 
-                    item_endpoint["children"] = []
-                    collection_endpoint["children"].append(item_endpoint)
+                    collection_endpoint["children"] = [item_endpoint]
+
+                    # "children" is only added to the item endpoint when it has children, so empty
+                    # children lists never need to be removed. The number of reference and backref
+                    # children is known up front.
+                    num_children = len(reference_items) + len(backref_items)
+                    if num_children:
+                        item_endpoint["children"] = [None] * num_children
 
                     # References
-                    for item_name, item in six.iteritems(child_visitor.references):
-                        # We don't need to include the parent/child relationships,
-                        # as those relationships are implied by the uri structure.
-                        if item.IsParentChild:
-                            continue
+                    for child_index, (item_name, item) in enumerate(reference_items):
+                        referenced_name = item.ReferencedObject.SingularPascalName
 
-                        reference_endpoint = OrderedDict()
+                        reference_endpoint = {}
 
-                        reference_endpoint["uri"] = "{}/".format(item_name)
-                        reference_endpoint["group"] = obj.UniqueName
+                        reference_endpoint["uri"] = f"{item_name}/"
+                        reference_endpoint["group"] = unique_name
 
                         reference_endpoint["methods"] = []
 
-                        item_endpoint["children"].append(reference_endpoint)
+                        item_endpoint["children"][child_index] = reference_endpoint
 
                         if item.RelationshipType == Relationship.RelationshipType.ManyToMany:
                             reference_endpoint["context"] = "HttpGeneratorRestPlugin::reference_collection"
@@ -437,7 +430,7 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "ENUMERATE",
-                                    "description": "Returns all '{}' references".format(item.ReferencedObject.SingularPascalName),
+                                    "description": f"Returns all '{referenced_name}' references",
                                 },
                             )
 
@@ -446,24 +439,24 @@ class Plugin(RelationalPluginImpl):
                                     {
                                         "verb": "POST",
                                         "summary": "CREATE",
-                                        "description": "Creates a '{}' reference".format(item.ReferencedObject.SingularPascalName),
+                                        "description": f"Creates a '{referenced_name}' reference",
                                     },
                                 )
 
                             # Individual items
-                            reference_item_endpoint = OrderedDict()
+                            reference_item_endpoint = {}
 
                             reference_item_endpoint["context"] = "HttpGeneratorRestPlugin::reference_collection_item"
 
-                            id_name = "{}_id".format(item.ReferencedObject.SingularSnakeName)
+                            id_name = f"{item.ReferencedObject.SingularSnakeName}_id"
 
-                            reference_item_endpoint["uri"] = "{{{}}}/".format(id_name)
-                            reference_item_endpoint["group"] = obj.UniqueName
+                            reference_item_endpoint["uri"] = f"{{{id_name}}}/"
+                            reference_item_endpoint["group"] = unique_name
 
                             reference_item_endpoint["variables"] = [
                                 {
                                     "name": id_name,
-                                    "simple_schema": simple_schema_visitor.Accept(GetReferenceIdTypeInfo(item), id_name),
+                                    "simple_schema": ToSimpleSchema(GetReferenceIdTypeInfo(item), id_name),
                                 },
                             ]
 
@@ -471,7 +464,7 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "READ",
-                                    "description": "Returns the '{}' reference item".format(item.ReferencedObject.SingularPascalName),
+                                    "description": f"Returns the '{referenced_name}' reference item",
                                 },
                             ]
 
@@ -480,7 +473,7 @@ class Plugin(RelationalPluginImpl):
                                     {
                                         "verb": "DELETE",
                                         "summary": "DELETE",
-                                        "description": "Deletes the '{}' reference item".format(item.ReferencedObject.SingularPascalName),
+                                        "description": f"Deletes the '{referenced_name}' reference item",
                                     },
                                 )
 
@@ -493,7 +486,7 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "READ",
-                                    "description": "Returns the '{}' reference".format(item.ReferencedObject.SingularPascalName),
+                                    "description": f"Returns the '{referenced_name}' reference",
                                 },
                             )
 
@@ -502,7 +495,7 @@ class Plugin(RelationalPluginImpl):
                                     {
                                         "verb": "PATCH",
                                         "summary": "UPDATE",
-                                        "description": "Updates the '{}' reference".format(item.ReferencedObject.SingularPascalName),
+                                        "description": f"Updates the '{referenced_name}' reference",
                                     },
                                 )
 
@@ -511,25 +504,22 @@ class Plugin(RelationalPluginImpl):
                                     {
                                         "verb": "DELETE",
                                         "summary": "DELETE",
-                                        "description": "Deletes the '{}' reference".format(item.ReferencedObject.SingularPascalName),
+                                        "description": f"Deletes the '{referenced_name}' reference",
                                     },
                                 )
 
                     # Backrefs
-                    for item_name, item in six.iteritems(child_visitor.backrefs):
-                        # We don't need to include the parent/child relationships,
-                        # as those relationships are implied by the uri structure.
-                        if item.IsParentChild:
-                            continue
+                    for child_index, (item_name, item) in enumerate(backref_items, len(reference_items)):
+                        referencing_name = item.ReferencingObject.SingularPascalName
 
-                        backref_endpoint = OrderedDict()
+                        backref_endpoint = {}
 
-                        backref_endpoint["uri"] = "{}/".format(item.BackrefName)
-                        backref_endpoint["group"] = obj.UniqueName
+                        backref_endpoint["uri"] = f"{item.BackrefName}/"
+                        backref_endpoint["group"] = unique_name
 
                         backref_endpoint["methods"] = []
 
-                        item_endpoint["children"].append(backref_endpoint)
+                        item_endpoint["children"][child_index] = backref_endpoint
 
                         if item.RelationshipType == Relationship.RelationshipType.OneToOne:
                             backref_endpoint["context"] = "HttpGeneratorRestPlugin::backref_item"
@@ -538,7 +528,7 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "READ",
-                                    "description": "Returns the '{}' backref".format(item.ReferencingObject.SingularPascalName),
+                                    "description": f"Returns the '{referencing_name}' backref",
                                 },
                             )
 
@@ -549,24 +539,24 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "ENUMERATE",
-                                    "description": "Returns all '{}' backrefs".format(item.ReferencingObject.SingularPascalName),
+                                    "description": f"Returns all '{referencing_name}' backrefs",
                                 },
                             )
 
                             # Individual items
-                            backref_item_endpoint = OrderedDict()
+                            backref_item_endpoint = {}
 
                             backref_item_endpoint["context"] = "HttpGeneratorRestPlugin::backref_collection_item"
 
-                            id_name = "{}_id".format(item.ReferencingObject.SingularSnakeName)
+                            id_name = f"{item.ReferencingObject.SingularSnakeName}_id"
 
-                            backref_item_endpoint["uri"] = "{{{}}}/".format(id_name)
-                            backref_item_endpoint["group"] = obj.UniqueName
+                            backref_item_endpoint["uri"] = f"{{{id_name}}}/"
+                            backref_item_endpoint["group"] = unique_name
 
                             backref_item_endpoint["variables"] = [
                                 {
                                     "name": id_name,
-                                    "simple_schema": simple_schema_visitor.Accept(GetBackrefIdTypeInfo(item), id_name),
+                                    "simple_schema": ToSimpleSchema(GetBackrefIdTypeInfo(item), id_name),
                                 },
                             ]
 
@@ -574,37 +564,96 @@ class Plugin(RelationalPluginImpl):
                                 {
                                     "verb": "GET",
                                     "summary": "READ",
-                                    "description": "Returns the '{}' backref item".format(item.ReferencingObject.SingularPascalName),
+                                    "description": f"Returns the '{referencing_name}' backref item",
                                 },
                             ]
 
                             backref_endpoint["children"] = [backref_item_endpoint]
 
-                    endpoint_lookup[obj.Element.DottedName] = item_endpoint["children"]
+                    endpoint_lookup[element.DottedName] = item_endpoint
 
-                # Remove all empty children objects
-                # ----------------------------------------------------------------------
-                def RemoveEmptyChildren(endpoint):
-                    if "children" in endpoint:
-                        if not endpoint["children"]:
-                            del endpoint["children"]
-                        else:
-                            for child in endpoint["children"]:
-                                RemoveEmptyChildren(child)
+                # Commit the content
+                yaml.dump(
+                    {
+                        "simple_schema_content": "".join(simple_schemas),
+                        "endpoints": endpoints,
+                    },
+                    f,
+                    Dumper=_YamlDumper,
+                    default_flow_style=False,
+                    allow_unicode=True,
+                    sort_keys=False,
+                )
 
-                # ----------------------------------------------------------------------
 
-                for endpoint in endpoints:
-                    RemoveEmptyChildren(endpoint)
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+@Interface.staticderived
+class _ChildVisitor(ChildVisitorBase):
+    # ----------------------------------------------------------------------
+    def __init__(self):
+        self.identities     = OrderedDict()
+        self.items          = OrderedDict()
+        self.update_items   = OrderedDict()
+        self.references     = OrderedDict()
+        self.backrefs       = OrderedDict()
 
-                # Commit the content
-                f.write(
-                    rtyaml.dump(
-                        OrderedDict(
-                            [
-                                ("simple_schema_content", "".join(simple_schemas)),
-                                ("endpoints", endpoints),
-                            ],
-                        ),
-                    ),
+    # ----------------------------------------------------------------------
+    @Interface.override
+    def OnIdentity(self, item):
+        self.identities[item.Name] = item
+
+    # ----------------------------------------------------------------------
+    @Interface.override
+    def OnFundamental(self, item):
+        self.items[item.Name] = item
+
+        if item.IsMutable:
+            # Optional values and strings (because empty strings aren't valid)
+            # need additional information in order to support scenarios where
+            # the value should be reset.
+            if item.TypeInfo.Arity.IsOptional or isinstance(item.TypeInfo, StringTypeInfo):
+                self.update_items[f"_{item.Name}_reset_value"] = BoolTypeInfo(
+                    arity=_OPTIONAL_ARITY,
                 )
+
+            # Only the arity is modified, so a shallow copy is sufficient
+            type_info = copy.copy(item.TypeInfo)
+
+            type_info.Arity = _OPTIONAL_ARITY
+
+            self.update_items[item.Name] = type_info
+
+    # ----------------------------------------------------------------------
+    @Interface.override
+    def OnReference(self, item):
+        self.references[item.ReferenceName]= item
+
+    # ----------------------------------------------------------------------
+    @Interface.override
+    def OnBackref(self, item):
+        self.backrefs[item.BackrefName] = item
+
+
+# ----------------------------------------------------------------------
+def _Indent(content):
+    """Indents all but the first line of content so that it aligns with a template's '{}' placeholder"""
+
+    return StringHelpers.LeftJustify(content, 4)
+
+
+# ----------------------------------------------------------------------
+class _YamlDumper(_YamlDumperBase):
+    """Writes multiline strings as literal blocks so that the SimpleSchema content remains readable"""
+
+    # ----------------------------------------------------------------------
+    def _RepresentString(self, value):
+        return self.represent_scalar(
+            "tag:yaml.org,2002:str",
+            value,
+            style="|" if "\n" in value else None,
+        )
+
+
+_YamlDumper.add_representer(str, _YamlDumper._RepresentString)
@@ -18,8 +18,6 @@
 import json
 import os
 
-import six
-
 import CommonEnvironment
 from CommonEnvironment import Interface
 from CommonEnvironment.Shell.All import CurrentShell
@@ -42,6 +40,16 @@ _script_fullpath                            = CommonEnvironment.ThisFullpath()
 _script_dir, _script_name                   = os.path.split(_script_fullpath)
 # ----------------------------------------------------------------------
 
+_FORMAT_BY_TYPE_INFO                        = {
+    BoolTypeInfo: "checkbox",
+    DateTimeTypeInfo: "datetime-local",
+    DateTypeInfo: "date",
+    FloatTypeInfo: "number",
+    IntTypeInfo: "number",
+    TimeTypeInfo: "time",
+    UriTypeInfo: "url",
+}
+
 
 # ----------------------------------------------------------------------
 @Interface.staticderived
@@ -92,8 +100,7 @@ class Plugin(JsonSchemaPlugin):
         arrays_as_tables,
         **kwargs,
     ):
-        output_filenames = list(output_filenames)
-        json_editor_output_filename = output_filenames.pop(0)
+        json_editor_output_filename, *output_filenames = output_filenames
 
         result = super(Plugin, cls).Generate(
             simple_schema_generator,
@@ -118,79 +125,178 @@ class Plugin(JsonSchemaPlugin):
         status_stream.write("Creating '{}'...".format(json_editor_output_filename))
         with status_stream.DoneManager() as this_dm:
             include_map = cls._GenerateIncludeMap(elements, include_indexes)
-            include_dotted_names = set(six.iterkeys(include_map))
+            include_dotted_names = set(include_map)
 
             # Read the json schema output
-            with open(output_filenames[0]) as f:
-                json_schema = json.load(f)
+            json_schema = _LoadJson(output_filenames[0])
+
+            # Definitions are named "_<dotted name>" and "_<dotted name>_Item"; organize them by
+            # dotted name once rather than building the names for every lookup. A name that ends
+            # with "_Item" is ambiguous, so it is recorded under both interpretations.
+            definition_table = {}
+
+            for definition_name, definition in json_schema["definitions"].items():
+                if not definition_name.startswith("_"):
+                    continue
+
+                dotted_name = definition_name[1:]
 
-            plugin_cls = cls
+                definition_table.setdefault(dotted_name, [None, None])[0] = definition
+
+                if dotted_name.endswith("_Item"):
+                    definition_table.setdefault(dotted_name[:-len("_Item")], [None, None])[1] = definition
 
             # ----------------------------------------------------------------------
-            class Visitor(Elements.ElementVisitor):
+            def GetSchemaDefinition(dotted_name, item_definition=False):
+                """Returns the definition (or item definition) for the element with the dotted name"""
+
+                definitions = definition_table.get(dotted_name, None)
+                assert definitions is not None, dotted_name
+
+                definition = definitions[1 if item_definition else 0]
+                assert definition is not None, (dotted_name, item_definition)
+
+                return definition
+
+            # ----------------------------------------------------------------------
+            def GetTypedSchemaDefinition(dotted_name):
+                """Returns the definition for the element with the dotted name, or its item definition if the definition doesn't have a type"""
+
+                definitions = definition_table.get(dotted_name, None)
+                assert definitions is not None, dotted_name
+
+                definition, item_definition = definitions
+                assert definition is not None, dotted_name
+
+                if "type" in definition:
+                    return definition
+
+                assert item_definition is not None, dotted_name
+                return item_definition
+
+            # Descriptions are frequently repeated, so elements with the same description share
+            # the same options (which aren't modified once assigned).
+            options_cache = {}
+
+            # ----------------------------------------------------------------------
+            def GetOptions(description):
+                """Returns the options for an element with the description"""
+
+                options = options_cache.get(description, None)
+                if options is None:
+                    options = {
+                        "infoText": description,
+                    }
+
+                    options_cache[description] = options
+
+                return options
+
+            # ----------------------------------------------------------------------
+
+            # arrays_as_tables doesn't change during generation, so the OnElement implementation is
+            # selected once rather than checking the setting for every element.
+            if arrays_as_tables:
                 # ----------------------------------------------------------------------
-                @classmethod
-                @Interface.override
-                def OnExitingElement(cls, element):
-                    if isinstance(element, Elements.ReferenceElement):
-                        return
-
-                    definition = cls._GetSchemaDefinition(element)
-                    if "type" not in definition:
-                        definition = cls._GetSchemaDefinition(
-                            element,
-                            item_definition=True,
-                        )
-
-                    if arrays_as_tables:
-                        if definition.get("type", None) == "array":
-                            definition["format"] = "table"
-
-                    if element.description:
-                        definition["options"] = {
-                            "infoText": element.description,
-                        }
+                def OnElement(element, dotted_name):
+                    definition = GetTypedSchemaDefinition(dotted_name)
+
+                    if definition.get("type", None) == "array":
+                        definition["format"] = "table"
+
+                    description = element.description
+                    if description:
+                        definition["options"] = GetOptions(description)
 
                 # ----------------------------------------------------------------------
-                @classmethod
-                @Interface.override
-                def OnFundamental(cls, element):
-                    format = {
-                        BoolTypeInfo: "checkbox",
-                        DateTimeTypeInfo: "datetime-local",
-                        DateTypeInfo: "date",
-                        FloatTypeInfo: "number",
-                        IntTypeInfo: "number",
-                        TimeTypeInfo: "time",
-                        UriTypeInfo: "url",
-                    }.get(type(element.TypeInfo), None)
-
-                    if format is not None:
-                        definition = cls._GetSchemaDefinition(
-                            element,
-                            item_definition=True,
-                        )
-
-                        definition["format"] = format
 
+            else:
                 # ----------------------------------------------------------------------
-                @classmethod
-                @Interface.override
-                def OnCompound(cls, element):
-                    compound_definition = cls._GetSchemaDefinition(
-                        element,
+                def OnElement(element, dotted_name):
+                    description = element.description
+                    if description:
+                        GetTypedSchemaDefinition(dotted_name)["options"] = GetOptions(description)
+
+                # ----------------------------------------------------------------------
+
+            enumerate_children = cls._EnumerateChildren
+
+            # ----------------------------------------------------------------------
+            def OnFundamental(element, dotted_name):
+                format = _FORMAT_BY_TYPE_INFO.get(type(element.TypeInfo), None)
+
+                if format is not None:
+                    definition = GetSchemaDefinition(
+                        dotted_name,
                         item_definition=True,
                     )
 
-                    for child_index, child in enumerate(plugin_cls._EnumerateChildren(
-                        element,
-                        include_definitions=False,
-                    )):
-                        child_definition = compound_definition["properties"].get(child.Name, None)
-                        assert child_definition is not None
-                        assert "$ref" in child_definition
+                    definition["format"] = format
+
+                OnElement(element, dotted_name)
+
+            # ----------------------------------------------------------------------
+            def OnCompound(element, dotted_name):
+                properties = GetSchemaDefinition(
+                    dotted_name,
+                    item_definition=True,
+                )["properties"]
+
+                # The properties are generally written in the same order as the children, in which
+                # case the definitions are used as they are encountered; a child's definition is only
+                # looked up by name when the orders differ.
+                property_items = iter(properties.items())
+
+                for child_index, child in enumerate(enumerate_children(
+                    element,
+                    include_definitions=False,
+                )):
+                    property_name, child_definition = next(property_items, (None, None))
 
-                        child_definition["propertyOrder"] = child_index
+                    if property_name != child.Name:
+                        child_definition = properties[child.Name]
+
+                    assert "$ref" in child_definition, child.Name
+
+                    child_definition["propertyOrder"] = child_index
+
+                OnElement(element, dotted_name)
+
+            # ----------------------------------------------------------------------
+
+            # All changes are made in OnExitingElement (which is called for every element) via a
+            # lookup on the element's type rather than through a second visitor method for every
+            # element. Elements of other types use OnElement; None indicates that there is nothing
+            # to do.
+            get_element_handler = {
+                Elements.ReferenceElement: None,
+                Elements.FundamentalElement: OnFundamental,
+                Elements.CompoundElement: OnCompound,
+            }.get
+
+            # ----------------------------------------------------------------------
+            class Visitor(Elements.ElementVisitor):
+                # ----------------------------------------------------------------------
+                @staticmethod
+                @Interface.override
+                def OnExitingElement(element):
+                    handler = get_element_handler(type(element), OnElement)
+                    if handler is not None:
+                        handler(element, element.DottedName)
+
+                # ----------------------------------------------------------------------
+                @staticmethod
+                @Interface.override
+                def OnFundamental(element):
+                    # Handled in OnExitingElement
+                    pass
+
+                # ----------------------------------------------------------------------
+                @staticmethod
+                @Interface.override
+                def OnCompound(element):
+                    # Handled in OnExitingElement
+                    pass
 
                 # ----------------------------------------------------------------------
                 @staticmethod
@@ -238,24 +344,6 @@ class Plugin(JsonSchemaPlugin):
                 def OnExtension(element):
                     raise Exception("ExtensionElements are not supported")
 
-                # ----------------------------------------------------------------------
-                # ----------------------------------------------------------------------
-                # ----------------------------------------------------------------------
-                @staticmethod
-                def _GetSchemaDefinition(
-                    element,
-                    item_definition=False,
-                ):
-                    attribute_name = "_{}".format(element.DottedName)
-
-                    if item_definition:
-                        attribute_name += "_Item"
-
-                    attribute_value = json_schema["definitions"].get(attribute_name, None)
-                    assert attribute_value is not None, attribute_name
-
-                    return attribute_value
-
             # ----------------------------------------------------------------------
 
             Visitor().Accept(
@@ -263,11 +351,23 @@ class Plugin(JsonSchemaPlugin):
                 include_dotted_names=include_dotted_names,
             )
 
+            # The content is serialized in memory and written with a single call
+            content = json.dumps(
+                json_schema,
+                indent=2,
+                separators=[", ", " : "],
+                sort_keys=True,
+            )
+
             with open(json_editor_output_filename, "w") as f:
-                json.dump(
-                    json_schema,
-                    f,
-                    indent=2,
-                    separators=[", ", " : "],
-                    sort_keys=True,
-                )
+                f.write(content)
+
+
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+def _LoadJson(filename):
+    """Returns the content of the JSON file"""
+
+    with open(filename, "rb") as f:
+        return json.loads(f.read())
@@ -25,15 +25,12 @@ import textwrap
 
 from collections import OrderedDict
 
-import six
-
 import CommonEnvironment
 from CommonEnvironment.CallOnExit import CallOnExit
 from CommonEnvironment import FileSystem
 from CommonEnvironment import Interface
 from CommonEnvironment import Process
 from CommonEnvironment.Shell.All import CurrentShell
-from CommonEnvironment import StringHelpers
 
 from CommonEnvironmentEx.CompilerImpl.GeneratorPluginFrameworkImpl.PluginBase import PluginBase
 
@@ -42,6 +39,31 @@ _script_fullpath                            = CommonEnvironment.ThisFullpath()
 _script_dir, _script_name                   = os.path.split(_script_fullpath)
 # ----------------------------------------------------------------------
 
+# Templates used when writing SimpleSchema content
+_ELEMENT_TEMPLATE                           = textwrap.dedent(
+    """\
+    <{}>:
+        {}
+
+    """,
+)
+
+_SIMPLE_SCHEMA_CONTENT_TEMPLATE             = textwrap.dedent(
+    """\
+    # {}-specific content
+    {}
+    <simple_schema_delimiter_{} string>
+
+    """,
+)
+
+# The element name prefix and attribute name of each collection of items within a request
+_REQUEST_ITEM_SPECS                         = (
+    ("header_", "headers"),
+    ("query_", "query_items"),
+    ("form_", "form_items"),
+)
+
 # ----------------------------------------------------------------------
 class Plugin(PluginBase):
     """Abstract base class for HttpGenerator plugins"""
@@ -53,6 +75,9 @@ class Plugin(PluginBase):
     # ----------------------------------------------------------------------
     URI_PARAMETER_REGEX                     = re.compile(r"\{(?P<name>.+?)\}")
 
+    # Bound method of URI_PARAMETER_REGEX for use when processing many uris
+    URI_PARAMETER_FINDALL                   = URI_PARAMETER_REGEX.findall
+
     # ----------------------------------------------------------------------
     # |
     # |  Public Methods
@@ -85,133 +110,30 @@ class Plugin(PluginBase):
 
         # Write to a temp file, and only copy the content if it is different from the
         # existing file (if any).
-        with open(temp_filename, "w") as f:
-            delimiter_index = 0
-
-            # ----------------------------------------------------------------------
-            def ElementToString(element_name, simple_schema_content):
-                return textwrap.dedent(
-                    """\
-                    <{}>:
-                        {}
-
-                    """,
-                ).format(
-                    element_name,
-                    StringHelpers.LeftJustify(simple_schema_content, 4).rstrip(),
-                )
-
-            # ----------------------------------------------------------------------
-            def SimpleSchemaContentToString(element_type, simple_schema_content):
-                nonlocal delimiter_index
-
-                result = textwrap.dedent(
-                    """\
-                    # {}-specific content
-                    {}
-                    <simple_schema_delimiter_{} string>
-
-                    """,
-                ).format(
-                    element_type,
-                    simple_schema_content,
-                    delimiter_index,
-                )
-
-                delimiter_index += 1
-
-                return result
-
-            # ----------------------------------------------------------------------
-            def GenerateEndpointContent(endpoint, endpoint_index):
-                endpoint_sink = six.moves.StringIO()
-
-                if endpoint.simple_schema_content:
-                    endpoint_sink.write(SimpleSchemaContentToString("Endpoint", endpoint.simple_schema_content))
+        with open(temp_filename, "wb") as f:
+            # Content is encoded and written in large blocks: all of the global content, and then
+            # the content for each top-level endpoint.
+            global_content = []
 
-                for variable_index, variable in enumerate(endpoint.variables):
-                    endpoint_sink.write(ElementToString("variable_{}".format(variable_index), variable.simple_schema))
-
-                for method_index, method in enumerate(endpoint.methods):
-                    method_sink = six.moves.StringIO()
-
-                    if method.simple_schema_content:
-                        method_sink.write(SimpleSchemaContentToString("Method", method.simple_schema_content))
-
-                    for request_index, request in enumerate(method.requests):
-                        request_sink = six.moves.StringIO()
-
-                        for prefix, items in [
-                            ("header_", request.headers),
-                            ("query_", request.query_items),
-                            ("form_", request.form_items),
-                        ]:
-                            for item_index, item in enumerate(items):
-                                request_sink.write(ElementToString("{}{}".format(prefix, item_index), item.simple_schema))
-
-                        if request.body:
-                            request_sink.write(ElementToString("body", request.body.simple_schema))
-
-                        request_sink = request_sink.getvalue()
-                        if request_sink:
-                            method_sink.write(ElementToString("request_{}".format(request_index), request_sink))
-
-                    for response_index, response in enumerate(method.responses):
-                        response_sink = six.moves.StringIO()
-
-                        if response.simple_schema_content:
-                            response_sink.write(SimpleSchemaContentToString("Response{}".format(response_index), response.simple_schema_content))
-
-                        for content_index, content in enumerate(response.contents):
-                            content_sink = six.moves.StringIO()
-
-                            for prefix, items in [
-                                ("header_", content.headers),
-                            ]:
-                                for item_index, item in enumerate(items):
-                                    content_sink.write(ElementToString("{}{}".format(prefix, item_index), item.simple_schema))
-
-                            if content.body:
-                                content_sink.write(ElementToString("body", content.body.simple_schema))
-
-                            content_sink = content_sink.getvalue()
-                            if content_sink:
-                                response_sink.write(ElementToString("content_{}".format(content_index), content_sink))
-
-                        response_sink = response_sink.getvalue()
-                        if response_sink:
-                            method_sink.write(ElementToString("response_{}".format(response_index), response_sink))
-
-                    method_sink = method_sink.getvalue()
-                    if method_sink:
-                        endpoint_sink.write(ElementToString("method_{}".format(method_index), method_sink))
-
-                for child_index, child in enumerate(endpoint.children):
-                    result = GenerateEndpointContent(child, child_index)
-                    if result:
-                        endpoint_sink.write(result)
-
-                endpoint_sink = endpoint_sink.getvalue()
-                if endpoint_sink:
-                    return ElementToString("endpoint_{}".format(endpoint_index), endpoint_sink)
-
-                return None
+            for root in roots.values():
+                if root.simple_schema_content:
+                    global_content.append(_SimpleSchemaContentToString("Global", root.simple_schema_content, len(global_content), 0))
 
-            # ----------------------------------------------------------------------
+            f.write("".join(global_content).encode("utf-8"))
 
-            for root in six.itervalues(roots):
-                if root.simple_schema_content:
-                    result = SimpleSchemaContentToString("Global", root.simple_schema_content)
-                    assert result
+            delimiter_index = len(global_content)
 
-                    f.write(result)
+            # The same content is frequently written for items with the same name at the same
+            # depth (for example, common headers), so strings generated while writing this file
+            # are reused.
+            element_strings = {}
 
             endpoint_index = 0
-            for root in six.itervalues(roots):
+
+            for root in roots.values():
                 for endpoint in root.endpoints:
-                    result = GenerateEndpointContent(endpoint, endpoint_index)
-                    if result:
-                        f.write(result)
+                    content, delimiter_index = _GenerateEndpointContent(endpoint, endpoint_index, delimiter_index, element_strings)
+                    f.write(content)
 
                     endpoint_index += 1
 
@@ -285,149 +207,345 @@ class Plugin(PluginBase):
 
         # Extract the content
 
-        # ----------------------------------------------------------------------
-        def FindElement(content, content_name):
-            for item in content:
-                if item.Name == content_name:
-                    return item
+        # Extract the global schema; the delimiters that end each root's content are located
+        # in a single pass.
+        delimiter_indexes = iter(
+            [
+                index
+                for index, element in enumerate(content)
+                if element.Name.startswith("simple_schema_delimiter_")
+            ],
+        )
+
+        global_simple_schema_index = 0
+
+        for root in roots.values():
+            if not root.simple_schema_content:
+                continue
+
+            delimiter_index = next(delimiter_indexes, len(content))
+
+            root.simple_schema_content = {
+                "string" : root.simple_schema_content,
+                "elements" : content[global_simple_schema_index : delimiter_index],
+            }
+
+            # Move beyond the delimiter
+            global_simple_schema_index = delimiter_index + 1
+
+        # Extract the endpoints. The endpoint tree is walked with an explicit stack (of the
+        # elements that contain the endpoint, the endpoint, and its index) rather than recursively.
+        content_by_name = _GetElementsByName(content)
+
+        endpoint_stack = []
+        endpoint_index = 0
 
-            return None
+        for root in roots.values():
+            for endpoint in root.endpoints:
+                endpoint_stack.append((content_by_name, endpoint, endpoint_index))
+                endpoint_index += 1
 
-        # ----------------------------------------------------------------------
-        def GetTypeInfo(element):
-            if len(element.TypeInfo.Items) != 1:
-                raise Exception("Multiple values were found '{}'".format(list(six.iterkeys(element.TypeInfo.Items))))
+        # Items are popped from the end of the stack, so reverse it to process the endpoints in order
+        endpoint_stack.reverse()
 
-            return next(six.itervalues(element.TypeInfo.Items))
+        while endpoint_stack:
+            parent_elements, endpoint, endpoint_index = endpoint_stack.pop()
 
-        # ----------------------------------------------------------------------
-        def ProcessEndpoint(content, endpoint, endpoint_index, name_prefix):
-            endpoint_name = "endpoint_{}".format(endpoint_index)
+            endpoint_element = parent_elements.get(f"endpoint_{endpoint_index}")
+            if endpoint_element is None:
+                continue
 
-            content = FindElement(content, endpoint_name)
-            if content is None:
-                return
+            # Each element's children are organized by name once and reused for all of its items
+            endpoint_children = _GetElementsByName(endpoint_element.Children)
 
             for variable_index, variable in enumerate(endpoint.variables):
-                element = FindElement(content.Children, "variable_{}".format(variable_index))
+                element = endpoint_children.get(f"variable_{variable_index}")
                 assert element
 
                 variable.simple_schema = {
                     "string" : variable.simple_schema,
                     "element" : element,
-                    "type_info" : GetTypeInfo(element),
+                    "type_info" : _GetTypeInfo(element),
                 }
 
             for method_index, method in enumerate(endpoint.methods):
-                method_name = "method_{}".format(method_index)
+                method_name = f"method_{method_index}"
 
-                method_element = FindElement(content.Children, method_name)
+                method_element = endpoint_children.get(method_name)
                 if method_element is None:
                     continue
 
+                method_children = _GetElementsByName(method_element.Children)
+
                 for request_index, request in enumerate(method.requests):
-                    request_name = "request_{}".format(request_index)
+                    request_name = f"request_{request_index}"
 
-                    request_element = FindElement(method_element.Children, request_name)
+                    request_element = method_children.get(request_name)
                     if request_element is None:
                         continue
 
-                    for prefix, items in [
-                        ("header_", request.headers),
-                        ("query_", request.query_items),
-                        ("form_", request.form_items),
-                    ]:
-                        for item_index, item in enumerate(items):
-                            element = FindElement(request_element.Children, "{}{}".format(prefix, item_index))
+                    request_children = _GetElementsByName(request_element.Children)
+
+                    for prefix, attribute_name in _REQUEST_ITEM_SPECS:
+                        for item_index, item in enumerate(getattr(request, attribute_name)):
+                            element = request_children.get(f"{prefix}{item_index}")
                             assert element
 
                             item.simple_schema = {
                                 "string" : item.simple_schema,
                                 "element" : element,
-                                "type_info" : GetTypeInfo(element),
+                                "type_info" : _GetTypeInfo(element),
                             }
 
                     if request.body:
-                        element = FindElement(request_element.Children, "body")
+                        element = request_children.get("body")
                         assert element
 
                         request.body.simple_schema = {
                             "string" : request.body.simple_schema,
                             "element" : element,
-                            "type_info" : GetTypeInfo(element),
+                            "type_info" : _GetTypeInfo(element),
                         }
 
                 for response_index, response in enumerate(method.responses):
-                    response_name = "response_{}".format(response_index)
+                    response_name = f"response_{response_index}"
 
-                    response_element = FindElement(method_element.Children, response_name)
+                    response_element = method_children.get(response_name)
                     if response_element is None:
                         continue
 
+                    response_children = _GetElementsByName(response_element.Children)
+
                     for content_type_index, content_type in enumerate(response.contents):
-                        content_name = "content_{}".format(content_type_index)
+                        content_name = f"content_{content_type_index}"
 
-                        content_type_element = FindElement(response_element.Children, content_name)
+                        content_type_element = response_children.get(content_name)
                         if content_type_element is None:
                             continue
 
-                        for prefix, items in [
-                            ("header_", content_type.headers),
-                        ]:
-                            for item_index, item in enumerate(items):
-                                item_name = "{}{}".format(prefix, item_index)
+                        content_type_children = _GetElementsByName(content_type_element.Children)
 
-                                element = FindElement(content_type_element.Children, item_name)
-                                assert element
+                        for item_index, item in enumerate(content_type.headers):
+                            element = content_type_children.get(f"header_{item_index}")
+                            assert element
 
-                                item.simple_schema = {
-                                    "string" : item.simple_schema,
-                                    "element" : element,
-                                    "type_info" : GetTypeInfo(element),
-                                }
+                            item.simple_schema = {
+                                "string" : item.simple_schema,
+                                "element" : element,
+                                "type_info" : _GetTypeInfo(element),
+                            }
 
                         if content_type.body:
-                            element = FindElement(content_type_element.Children, "body")
+                            element = content_type_children.get("body")
                             assert element
 
                             content_type.body.simple_schema = {
                                 "string" : content_type.body.simple_schema,
                                 "element" : element,
-                                "type_info" : GetTypeInfo(element),
+                                "type_info" : _GetTypeInfo(element),
                             }
 
-            for child_index, child in enumerate(endpoint.children):
-                ProcessEndpoint(content.Children, child, child_index, "{}{}_".format(name_prefix, endpoint_name))
+            endpoint_stack += reversed(
+                [
+                    (endpoint_children, child, child_index)
+                    for child_index, child in enumerate(endpoint.children)
+                ],
+            )
 
-        # ----------------------------------------------------------------------
 
-        # Extract the global schema
-        global_simple_schema_index = 0
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+# ----------------------------------------------------------------------
+# Content is generated as pieces that are already indented to their depth within the file,
+# rather than as strings for each element that are then justified (and copied) again by
+# every ancestor.
 
-        for root in six.itervalues(roots):
-            if not root.simple_schema_content:
-                continue
+# ----------------------------------------------------------------------
+_NON_BLANK_LINE_REGEX                       = re.compile(r"\n(?=[^\n]*\S)")
 
-            starting_global_simple_schema_index = global_simple_schema_index
+def _LeftJustify(content, indentation):
+    """Equivalent to StringHelpers.LeftJustify (lines other than the first, excluding blank lines, are indented) in a single pass"""
 
-            while global_simple_schema_index < len(content):
-                if content[global_simple_schema_index].Name.startswith("simple_schema_delimiter_"):
-                    break
+    return _NON_BLANK_LINE_REGEX.sub("\n" + " " * indentation, content)
 
-                global_simple_schema_index += 1
 
-            root.simple_schema_content = {
-                "string" : root.simple_schema_content,
-                "elements" : content[starting_global_simple_schema_index : global_simple_schema_index],
-            }
+# ----------------------------------------------------------------------
+def _Indent(content, indentation):
+    if not indentation:
+        return content
 
-            # Move beyond the delimiter
-            global_simple_schema_index += 1
+    return f"{' ' * indentation}{_LeftJustify(content, indentation)}"
 
-        # Extract the endpoints
-        endpoint_index = 0
 
-        for root in six.itervalues(roots):
-            for endpoint in root.endpoints:
-                ProcessEndpoint(content, endpoint, endpoint_index, "")
-                endpoint_index += 1
+# ----------------------------------------------------------------------
+def _ElementToString(element_name, simple_schema_content, indentation):
+    return _Indent(
+        _ELEMENT_TEMPLATE.format(
+            element_name,
+            _LeftJustify(simple_schema_content, 4).rstrip(),
+        ),
+        indentation,
+    )
+
+
+# ----------------------------------------------------------------------
+def _SimpleSchemaContentToString(element_type, simple_schema_content, delimiter_index, indentation):
+    return _Indent(
+        _SIMPLE_SCHEMA_CONTENT_TEMPLATE.format(
+            element_type,
+            simple_schema_content,
+            delimiter_index,
+        ),
+        indentation,
+    )
+
+
+# ----------------------------------------------------------------------
+def _AppendElement(sink, element_name, element_sink, indentation):
+    # Elements without content are not written
+    if element_sink:
+        sink.append(f"{' ' * indentation}<{element_name}>:\n")
+        sink += element_sink
+
+
+# ----------------------------------------------------------------------
+def _GenerateEndpointContent(endpoint, endpoint_index, delimiter_index, element_strings):
+    """Returns the top-level endpoint's content (encoded as UTF-8) and the next delimiter index"""
+
+    # ----------------------------------------------------------------------
+    def ElementToString(element_name, simple_schema_content, indentation):
+        key = (element_name, simple_schema_content, indentation)
+
+        result = element_strings.get(key, None)
+        if result is None:
+            result = _ElementToString(element_name, simple_schema_content, indentation)
+            element_strings[key] = result
+
+        return result
+
+    # ----------------------------------------------------------------------
+    def SimpleSchemaContentToString(element_type, simple_schema_content, indentation):
+        nonlocal delimiter_index
+
+        result = _SimpleSchemaContentToString(
+            element_type,
+            simple_schema_content,
+            delimiter_index,
+            indentation,
+        )
+
+        delimiter_index += 1
+
+        return result
+
+    # ----------------------------------------------------------------------
+    def GenerateContent(endpoint, indentation):
+        """Returns the pieces that make up the endpoint's content, excluding its children"""
+
+        method_indentation = indentation + 4
+        request_indentation = method_indentation + 4
+        item_indentation = request_indentation + 4
+        content_item_indentation = item_indentation + 4
+
+        endpoint_sink = []
+
+        if endpoint.simple_schema_content:
+            endpoint_sink.append(SimpleSchemaContentToString("Endpoint", endpoint.simple_schema_content, method_indentation))
+
+        for variable_index, variable in enumerate(endpoint.variables):
+            endpoint_sink.append(ElementToString(f"variable_{variable_index}", variable.simple_schema, method_indentation))
+
+        for method_index, method in enumerate(endpoint.methods):
+            method_sink = []
+
+            if method.simple_schema_content:
+                method_sink.append(SimpleSchemaContentToString("Method", method.simple_schema_content, request_indentation))
+
+            for request_index, request in enumerate(method.requests):
+                request_sink = []
+
+                for prefix, attribute_name in _REQUEST_ITEM_SPECS:
+                    for item_index, item in enumerate(getattr(request, attribute_name)):
+                        request_sink.append(ElementToString(f"{prefix}{item_index}", item.simple_schema, item_indentation))
+
+                if request.body:
+                    request_sink.append(ElementToString("body", request.body.simple_schema, item_indentation))
+
+                _AppendElement(method_sink, f"request_{request_index}", request_sink, request_indentation)
+
+            for response_index, response in enumerate(method.responses):
+                response_sink = []
+
+                if response.simple_schema_content:
+                    response_sink.append(SimpleSchemaContentToString(f"Response{response_index}", response.simple_schema_content, item_indentation))
+
+                for content_index, content in enumerate(response.contents):
+                    content_sink = []
+
+                    for item_index, item in enumerate(content.headers):
+                        content_sink.append(ElementToString(f"header_{item_index}", item.simple_schema, content_item_indentation))
+
+                    if content.body:
+                        content_sink.append(ElementToString("body", content.body.simple_schema, content_item_indentation))
+
+                    _AppendElement(response_sink, f"content_{content_index}", content_sink, item_indentation)
+
+                _AppendElement(method_sink, f"response_{response_index}", response_sink, request_indentation)
+
+            _AppendElement(endpoint_sink, f"method_{method_index}", method_sink, method_indentation)
+
+        return endpoint_sink
+
+    # ----------------------------------------------------------------------
+
+    # The endpoint tree is walked with an explicit stack rather than recursively. Each item is
+    # (endpoint, endpoint_index, indentation, parent_sink, endpoint_sink); endpoint_sink is None
+    # until the endpoint's own content has been generated. An endpoint is added to its parent's
+    # sink once all of its children have been added to its sink.
+    sink = []
+
+    stack = [(endpoint, endpoint_index, 0, sink, None)]
+
+    while stack:
+        endpoint, endpoint_index, indentation, parent_sink, endpoint_sink = stack.pop()
+
+        if endpoint_sink is not None:
+            _AppendElement(parent_sink, f"endpoint_{endpoint_index}", endpoint_sink, indentation)
+            continue
+
+        # Content is generated before the children's content so that delimiters are numbered
+        # in the order in which they are written.
+        endpoint_sink = GenerateContent(endpoint, indentation)
+
+        stack.append((endpoint, endpoint_index, indentation, parent_sink, endpoint_sink))
+
+        child_indentation = indentation + 4
+
+        stack += reversed(
+            [
+                (child, child_index, child_indentation, endpoint_sink, None)
+                for child_index, child in enumerate(endpoint.children)
+            ],
+        )
+
+    # The pieces are joined and encoded here so that a single block is written
+    content = "".join(sink).encode("utf-8")
+
+    return content, delimiter_index
+
+
+# ----------------------------------------------------------------------
+def _GetElementsByName(elements):
+    # Elements are found by name many times, so organize them once rather than searching
+    # for each one.
+    return {element.Name: element for element in elements}
+
+
+# ----------------------------------------------------------------------
+def _GetTypeInfo(element):
+    items = element.TypeInfo.Items
+
+    if len(items) != 1:
+        raise Exception("Multiple values were found '{}'".format(list(items.keys())))
+
+    return next(iter(items.values()))
@@ -33,6 +33,10 @@ _script_fullpath                            = CommonEnvironment.ThisFullpath()
 _script_dir, _script_name                   = os.path.split(_script_fullpath)
 # ----------------------------------------------------------------------
 
+# Generated files are written through a large buffer so that the header and content are
+# written together with few system calls.
+_OUTPUT_BUFFER_SIZE                         = 1024 * 1024
+
 with InitRelativeImports():
     from .Impl.WebserverPluginMixin import WebserverPluginMixin
     from ..Plugin import Plugin as PluginBase
@@ -134,7 +138,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
         status_stream.write("Writing '{}'...".format(filenames[0]))
         with status_stream.DoneManager():
-            with open(filenames[0], "w") as f:
+            with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                 f.write(file_header)
 
             filenames.pop(0)
@@ -144,7 +148,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
         status_stream.write("Writing '{}'...".format(filenames[0]))
         with status_stream.DoneManager():
-            with open(filenames[0], "w") as f:
+            with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                 f.write(file_header)
                 WriteFlaskMethods(f, endpoints, support_default_content_processor)
 
@@ -156,7 +160,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
             status_stream.write("Writing '{}'...".format(filenames[0]))
             with status_stream.DoneManager():
-                with open(filenames[0], "w") as f:
+                with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                     f.write(file_header)
 
                 filenames.pop(0)
@@ -166,7 +170,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
             status_stream.write("Writing '{}'...".format(filenames[0]))
             with status_stream.DoneManager():
-                with open(filenames[0], "w") as f:
+                with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                     f.write(file_header)
                     WriteFlaskApp(f)
 
@@ -177,7 +181,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
             status_stream.write("Writing '{}'...".format(filenames[0]))
             with status_stream.DoneManager():
-                with open(filenames[0], "w") as f:
+                with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                     f.write(file_header)
                     WriteApp(f, additional_python_paths)
 
@@ -188,7 +192,7 @@ class Plugin(WebserverPluginMixin, PluginBase):
 
             status_stream.write("Writing '{}'...".format(filenames[0]))
             with status_stream.DoneManager():
-                with open(filenames[0], "w") as f:
+                with open(filenames[0], "w", buffering=_OUTPUT_BUFFER_SIZE) as f:
                     f.write(file_header)
                     WriteRunSever(f)
 
@@ -206,387 +210,398 @@ class Plugin(WebserverPluginMixin, PluginBase):
 # ----------------------------------------------------------------------
 # ----------------------------------------------------------------------
 # ----------------------------------------------------------------------
-def WriteFlaskMethods(f, endpoints, support_default_content_processor):
-    content = []
 
+# Templates used by WriteFlaskMethods; they are dedented once rather than for every endpoint
+# and method written.
+_METHOD_TEMPLATE                            = textwrap.dedent(
+    """\
     # ----------------------------------------------------------------------
-    def Impl(endpoint, uri_parameters):
-        uri_parameters += endpoint.variables
+    def {lower_name}(self{args}):
+        return _Execute("{unique_name}_{name}"{args})
 
-        # ----------------------------------------------------------------------
-        def RemoveParameters():
-            iterations = len(endpoint.variables)
 
-            while iterations:
-                assert uri_parameters
-                uri_parameters.pop()
+    """,
+)
 
-                iterations -= 1
+_CLASS_TEMPLATE                             = textwrap.dedent(
+    """\
+    # ----------------------------------------------------------------------
+    class {name}(MethodView):
+        {methods}
 
-        # ----------------------------------------------------------------------
 
-        with CallOnExit(RemoveParameters):
-            method_content = []
+    app.add_url_rule(
+        "{uri}",
+        view_func={name}.as_view("{name}"),
+    )
 
-            # Process the variables
-            if uri_parameters:
-                args = ", {}".format(", ".join([variable.name for variable in uri_parameters]))
-            else:
-                args = ""
 
-            # Process the methods
-            for method in endpoint.methods:
-                method_content.append(
-                    textwrap.dedent(
-                        """\
-                        # ----------------------------------------------------------------------
-                        def {lower_name}(self{args}):
-                            return _Execute("{unique_name}_{name}"{args})
+    """,
+)
 
+_FLASK_METHODS_TEMPLATE                     = textwrap.dedent(
+    '''\
+    import os
+    import sys
+    import textwrap
+    import traceback
 
-                        """,
-                    ).format(
-                        name=method.verb,
-                        lower_name=method.verb.lower(),
-                        unique_name=endpoint.unique_name,
-                        args=args,
-                    ),
-                )
+    import six
 
-            if method_content:
-                content.append(
-                    textwrap.dedent(
-                        """\
-                        # ----------------------------------------------------------------------
-                        class {name}(MethodView):
-                            {methods}
+    from collections import OrderedDict
+    from urllib.parse import urlparse as uriparse
 
+    from flask import abort, request, Response
+    from flask.views import MethodView
 
-                        app.add_url_rule(
-                            "{uri}",
-                            view_func={name}.as_view("{name}"),
-                        )
+    import CommonEnvironment
+    from CommonEnvironment import StringHelpers
 
+    from CommonEnvironmentEx.Package import InitRelativeImports
 
-                        """,
-                    ).format(
-                        name=endpoint.unique_name,
-                        uri=endpoint.full_uri.replace("{", "<").replace("}", ">"),
-                        methods=StringHelpers.LeftJustify("".join(method_content).rstrip(), 4),
-                    ),
-                )
+    # ----------------------------------------------------------------------
+    _script_fullpath                            = CommonEnvironment.ThisFullpath()
+    _script_dir, _script_name                   = os.path.split(_script_fullpath)
+    # ----------------------------------------------------------------------
 
-            for child in endpoint.children:
-                Impl(child, uri_parameters)
+    with InitRelativeImports():
+        from .Exceptions import *
+        from .Interfaces import *
 
     # ----------------------------------------------------------------------
+    # ----------------------------------------------------------------------
+    # ----------------------------------------------------------------------
 
-    for endpoint in endpoints:
-        Impl(endpoint, [])
+    # app
+    try:
+        import FlaskApp
+
+        if hasattr(FlaskApp, "GetFlaskApp"):
+            app = FlaskApp.GetFlaskApp()
+        elif hasattr(FlaskApp, "app"):
+            app = FlaskApp.app
+        else:
+            raise ImportError()
+
+    except:
+        raise Exception(
+            textwrap.dedent(
+                """\\
+                The value 'app' or the method 'GetFlaskApp' must be implemented
+                in a python module named 'FlaskApp'.
+
+                    Example:
+                        def FlaskApp():
+                            from flask import Flask
+                            return Flask(__name__)
+
+                Exception Info:
+                    {{}}
+
+                """,
+            ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
+        )
 
-    f.write(
-        textwrap.dedent(
-            '''\
-            import os
-            import sys
-            import textwrap
-            import traceback
+    # Content processors
+    try:
+        import ContentProcessors
+
+        if hasattr(ContentProcessors, "GetContentProcessors"):
+            content_processors = ContentProcessors.GetContentProcessors()
+        elif hasattr(ContentProcessors, "content_processors"):
+            content_processors = ContentProcessors.content_processors
+        else:
+            raise ImportError()
+
+    except:
+        raise Exception(
+            textwrap.dedent(
+                """\\
+                The value 'content_processors' or the method 'GetContentProcessors' must be implemented
+                in a python module named 'ContentProcessors'.
+
+                    Example:
+                        from Interfaces import ContentProcessorInterface
+
+                        class HtmlContentProcessor(ContentProcessorInterface):
+                            ...
+
+                        class PlainTextContentProcessor(ContentProcessorInterface):
+                            ...
+
+                        def GetContentProcessors():
+                            return OrderedDict(
+                                [
+                                    ("text/html", HtmlContentProcessor),
+                                    ("text/plain", PlainTextContentProcessor),
+                                ],
+                            )
+
+                Exception Info:
+                    {{}}
+
+                """,
+            ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
+        )
 
-            import six
+    # Authenticator
+    try:
+        import Authenticator
 
-            from collections import OrderedDict
-            from urllib.parse import urlparse as uriparse
+        if hasattr(Authenticator, "GetAuthenticator"):
+            authenticator = Authenticator.GetAuthenticator()
+        elif hasattr(Authenticator, "authenticator"):
+            authenticator = Authenticator.authenticator
+        else:
+            raise ImportError()
 
-            from flask import abort, request, Response
-            from flask.views import MethodView
+    except:
+        raise Exception(
+            textwrap.dedent(
+                """\\
+                The value 'authenticator' or the method 'GetAuthenticator' must be implemented
+                in a python module named 'Authenticator'.
 
-            import CommonEnvironment
-            from CommonEnvironment import StringHelpers
+                Example:
+                    from Interfaces import AuthenticatorInterface
 
-            from CommonEnvironmentEx.Package import InitRelativeImports
+                    class CustomImplementation(AuthenticatorInterface):
+                        ...
 
-            # ----------------------------------------------------------------------
-            _script_fullpath                            = CommonEnvironment.ThisFullpath()
-            _script_dir, _script_name                   = os.path.split(_script_fullpath)
-            # ----------------------------------------------------------------------
+                    def GetAuthenticator():
+                        return CustomImplementation()
 
-            with InitRelativeImports():
-                from .Exceptions import *
-                from .Interfaces import *
+                Exception Info:
+                    {{}}
 
-            # ----------------------------------------------------------------------
-            # ----------------------------------------------------------------------
-            # ----------------------------------------------------------------------
+                """,
+            ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
+        )
 
-            # app
-            try:
-                import FlaskApp
-
-                if hasattr(FlaskApp, "GetFlaskApp"):
-                    app = FlaskApp.GetFlaskApp()
-                elif hasattr(FlaskApp, "app"):
-                    app = FlaskApp.app
-                else:
-                    raise ImportError()
-
-            except:
-                raise Exception(
-                    textwrap.dedent(
-                        """\\
-                        The value 'app' or the method 'GetFlaskApp' must be implemented
-                        in a python module named 'FlaskApp'.
-
-                            Example:
-                                def FlaskApp():
-                                    from flask import Flask
-                                    return Flask(__name__)
-
-                        Exception Info:
-                            {{}}
-
-                        """,
-                    ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
-                )
+    # Implementation
+    try:
+        import Implementation
 
-            # Content processors
-            try:
-                import ContentProcessors
-
-                if hasattr(ContentProcessors, "GetContentProcessors"):
-                    content_processors = ContentProcessors.GetContentProcessors()
-                elif hasattr(ContentProcessors, "content_processors"):
-                    content_processors = ContentProcessors.content_processors
-                else:
-                    raise ImportError()
-
-            except:
-                raise Exception(
-                    textwrap.dedent(
-                        """\\
-                        The value 'content_processors' or the method 'GetContentProcessors' must be implemented
-                        in a python module named 'ContentProcessors'.
-
-                            Example:
-                                from Interfaces import ContentProcessorInterface
-
-                                class HtmlContentProcessor(ContentProcessorInterface):
-                                    ...
-
-                                class PlainTextContentProcessor(ContentProcessorInterface):
-                                    ...
-
-                                def GetContentProcessors():
-                                    return OrderedDict(
-                                        [
-                                            ("text/html", HtmlContentProcessor),
-                                            ("text/plain", PlainTextContentProcessor),
-                                        ],
-                                    )
-
-                        Exception Info:
-                            {{}}
-
-                        """,
-                    ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
-                )
+        if hasattr(Implementation, "GetImplementation"):
+            implementation = Implementation.GetImplementation()
+        elif hasattr(Implementation, "implementation"):
+            implementation = Implementation.implementation
+        else:
+            raise ImportError()
 
-            # Authenticator
-            try:
-                import Authenticator
+    except:
+        raise Exception(
+            textwrap.dedent(
+                """\\
+                The value 'implementation' or the method 'GetImplementation' must be implemented
+                in a python module named 'Implementation'.
 
-                if hasattr(Authenticator, "GetAuthenticator"):
-                    authenticator = Authenticator.GetAuthenticator()
-                elif hasattr(Authenticator, "authenticator"):
-                    authenticator = Authenticator.authenticator
-                else:
-                    raise ImportError()
+                Example:
+                    from Interfaces import ImplementationInterface
 
-            except:
-                raise Exception(
-                    textwrap.dedent(
-                        """\\
-                        The value 'authenticator' or the method 'GetAuthenticator' must be implemented
-                        in a python module named 'Authenticator'.
+                    class CustomImplementation(ImplementationInterface):
+                        ...
 
-                        Example:
-                            from Interfaces import AuthenticatorInterface
+                    def GetImplementation():
+                        return CustomImplementation()
 
-                            class CustomImplementation(AuthenticatorInterface):
-                                ...
+                Exception Info:
+                    {{}}
 
-                            def GetAuthenticator():
-                                return CustomImplementation()
+                """,
+            ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
+        )
 
-                        Exception Info:
-                            {{}}
+    assert app
+    assert content_processors
+    assert authenticator
+    assert implementation
 
-                        """,
-                    ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
-                )
+    # ----------------------------------------------------------------------
+    # ----------------------------------------------------------------------
+    {methods}
 
-            # Implementation
-            try:
-                import Implementation
 
-                if hasattr(Implementation, "GetImplementation"):
-                    implementation = Implementation.GetImplementation()
-                elif hasattr(Implementation, "implementation"):
-                    implementation = Implementation.implementation
-                else:
-                    raise ImportError()
+    # ----------------------------------------------------------------------
+    # ----------------------------------------------------------------------
+    # ----------------------------------------------------------------------
+
+    # Note that a value of '*' supports any/all domains
+    _Execute_cors_domain                                = app.config.get("_FLASK_CORS_DOMAIN", None)
+    _default_content_processor_key                      = {default_content_processor_assignment_value}
+
+
+    # ----------------------------------------------------------------------
+    def _GetContentProcessorType():
+        if request.headers:
+            if "Accept" in request.headers:
+                for value in request.headers["Accept"].split(";"):
+                    value = value.split(",")[-1].strip()
 
-            except:
-                raise Exception(
-                    textwrap.dedent(
-                        """\\
-                        The value 'implementation' or the method 'GetImplementation' must be implemented
-                        in a python module named 'Implementation'.
+                    if value in content_processors:
+                        return value
 
-                        Example:
-                            from Interfaces import ImplementationInterface
+            if "Content-Type" in request.headers and and request.headers["Content-Type"] in content_processors:
+                return request.headers["Content-Type"]
 
-                            class CustomImplementation(ImplementationInterface):
-                                ...
+        if _default_content_processor_key is not None:
+            return _default_content_processor_key
 
-                            def GetImplementation():
-                                return CustomImplementation()
+        raise UnsupportedContentWebserverException()
 
-                        Exception Info:
-                            {{}}
 
-                        """,
-                    ).format(StringHelpers.LeftJustify(traceback.format_exc(), 4)),
+    # ----------------------------------------------------------------------
+    def _Execute(method_name, *args):
+        try:
+            content_processor_type = _GetContentProcessorType()
+
+            content_processor = content_processors[content_processor_type]
+
+            # Extract the content from the request values
+            context = getattr(content_processor, "{{}}_Request".format(method_name))(
+                app.debug,
+                args,
+                request.headers,
+                request.form,
+                request.args,
+                request.data,
+            )
+
+            with implementation.CreateScopedSession() as session:
+                # TODO # Authenticate
+                # TODO user = None # TODO
+                # TODO
+                # TODO getattr(authenticator, method_name)(app.debug, user, context)
+
+                # Calculate the result
+                result = getattr(implementation, method_name)(
+                    authenticator.Authenticate,
+                    app.debug,
+                    session,
+                    context,
                 )
 
-            assert app
-            assert content_processors
-            assert authenticator
-            assert implementation
+                # Strip any query parameters from the uri
+                uri_result = uriparse(request.url)
 
-            # ----------------------------------------------------------------------
-            # ----------------------------------------------------------------------
-            {methods}
+                uri = "{{scheme}}://{{netloc}}{{path}}".format(
+                    scheme=uri_result.scheme,
+                    netloc=uri_result.netloc,
+                    path=uri_result.path,
+                )
 
+                # Convert the result into http components
+                status_code, headers, body = getattr(content_processor, "{{}}_Response".format(method_name))(
+                    implementation.GetIds,
+                    app.debug,
+                    uri,
+                    result,
+                )
 
-            # ----------------------------------------------------------------------
-            # ----------------------------------------------------------------------
-            # ----------------------------------------------------------------------
+            headers = headers or {{}}
 
-            # Note that a value of '*' supports any/all domains
-            _Execute_cors_domain                                = app.config.get("_FLASK_CORS_DOMAIN", None)
-            _default_content_processor_key                      = {default_content_processor_assignment_value}
+            if "Content-Type" not in headers:
+                headers["Content-Type"] = content_processor_type
 
+            # Create the response based on the http components
+            response = Response(
+                body,
+                mimetype=content_processor_type,
+                headers=headers,
+                status=status_code,
+            )
 
-            # ----------------------------------------------------------------------
-            def _GetContentProcessorType():
-                if request.headers:
-                    if "Accept" in request.headers:
-                        for value in request.headers["Accept"].split(";"):
-                            value = value.split(",")[-1].strip()
+            if _Execute_cors_domain is not None:
+                domain = request.headers.get("Origin", None) or _Execute_cors_domain
+                assert domain is not None
 
-                            if value in content_processors:
-                                return value
+                response.headers["Access-Control-Allow-Origin"] = domain
 
-                    if "Content-Type" in request.headers and and request.headers["Content-Type"] in content_processors:
-                        return request.headers["Content-Type"]
+            return response
 
-                if _default_content_processor_key is not None:
-                    return _default_content_processor_key
+        except WebserverException as ex:
+            assert ex.Code is not None
 
-                raise UnsupportedContentWebserverException()
+            if ex.Desc:
+                abort(ex.Code, ex.Desc)
 
+            potential_content = str(ex)
+            if potential_content:
+                abort(ex.Code, potential_content)
 
-            # ----------------------------------------------------------------------
-            def _Execute(method_name, *args):
-                try:
-                    content_processor_type = _GetContentProcessorType()
-
-                    content_processor = content_processors[content_processor_type]
-
-                    # Extract the content from the request values
-                    context = getattr(content_processor, "{{}}_Request".format(method_name))(
-                        app.debug,
-                        args,
-                        request.headers,
-                        request.form,
-                        request.args,
-                        request.data,
-                    )
+            abort(ex.Code)
 
-                    with implementation.CreateScopedSession() as session:
-                        # TODO # Authenticate
-                        # TODO user = None # TODO
-                        # TODO
-                        # TODO getattr(authenticator, method_name)(app.debug, user, context)
-
-                        # Calculate the result
-                        result = getattr(implementation, method_name)(
-                            authenticator.Authenticate,
-                            app.debug,
-                            session,
-                            context,
-                        )
-
-                        # Strip any query parameters from the uri
-                        uri_result = uriparse(request.url)
-
-                        uri = "{{scheme}}://{{netloc}}{{path}}".format(
-                            scheme=uri_result.scheme,
-                            netloc=uri_result.netloc,
-                            path=uri_result.path,
-                        )
-
-                        # Convert the result into http components
-                        status_code, headers, body = getattr(content_processor, "{{}}_Response".format(method_name))(
-                            implementation.GetIds,
-                            app.debug,
-                            uri,
-                            result,
-                        )
-
-                    headers = headers or {{}}
-
-                    if "Content-Type" not in headers:
-                        headers["Content-Type"] = content_processor_type
-
-                    # Create the response based on the http components
-                    response = Response(
-                        body,
-                        mimetype=content_processor_type,
-                        headers=headers,
-                        status=status_code,
-                    )
+        except Exception as ex:
+            if app.debug:
+                trace = traceback.format_exc()
 
-                    if _Execute_cors_domain is not None:
-                        domain = request.headers.get("Origin", None) or _Execute_cors_domain
-                        assert domain is not None
+                sys.stdout.write(trace)
+                abort(500, trace)
 
-                        response.headers["Access-Control-Allow-Origin"] = domain
+            abort(500, str(ex))
+    ''',
+)
 
-                    return response
 
-                except WebserverException as ex:
-                    assert ex.Code is not None
+# ----------------------------------------------------------------------
+def WriteFlaskMethods(f, endpoints, support_default_content_processor):
+    content = []
 
-                    if ex.Desc:
-                        abort(ex.Code, ex.Desc)
+    # ----------------------------------------------------------------------
+    def Impl(endpoint, uri_parameters):
+        uri_parameters += endpoint.variables
 
-                    potential_content = str(ex)
-                    if potential_content:
-                        abort(ex.Code, potential_content)
+        # ----------------------------------------------------------------------
+        def RemoveParameters():
+            iterations = len(endpoint.variables)
 
-                    abort(ex.Code)
+            while iterations:
+                assert uri_parameters
+                uri_parameters.pop()
 
-                except Exception as ex:
-                    if app.debug:
-                        trace = traceback.format_exc()
+                iterations -= 1
 
-                        sys.stdout.write(trace)
-                        abort(500, trace)
+        # ----------------------------------------------------------------------
 
-                    abort(500, str(ex))
-            ''',
-        ).format(
+        with CallOnExit(RemoveParameters):
+            method_content = []
+
+            # Process the variables
+            if uri_parameters:
+                args = ", {}".format(", ".join([variable.name for variable in uri_parameters]))
+            else:
+                args = ""
+
+            # Process the methods
+            for method in endpoint.methods:
+                method_content.append(
+                    _METHOD_TEMPLATE.format(
+                        name=method.verb,
+                        lower_name=method.verb.lower(),
+                        unique_name=endpoint.unique_name,
+                        args=args,
+                    ),
+                )
+
+            if method_content:
+                content.append(
+                    _CLASS_TEMPLATE.format(
+                        name=endpoint.unique_name,
+                        uri=endpoint.full_uri.replace("{", "<").replace("}", ">"),
+                        methods=StringHelpers.LeftJustify("".join(method_content).rstrip(), 4),
+                    ),
+                )
+
+            for child in endpoint.children:
+                Impl(child, uri_parameters)
+
+    # ----------------------------------------------------------------------
+
+    for endpoint in endpoints:
+        Impl(endpoint, [])
+
+    f.write(
+        _FLASK_METHODS_TEMPLATE.format(
             methods="".join(content).rstrip(),
             default_content_processor_assignment_value="six.iterkeys(content_processors).next()" if support_default_content_processor else "None",
         ),
@@ -15,7 +15,7 @@
 # ----------------------------------------------------------------------
 """Generates HTTP-based code from provided information"""
 
-import importlib
+import importlib.util
 import itertools
 import os
 import re
@@ -23,10 +23,6 @@ import sys
 import textwrap
 import yaml
 
-from collections import namedtuple, OrderedDict
-
-import six
-
 import CommonEnvironment
 from CommonEnvironment.CallOnExit import CallOnExit
 from CommonEnvironment import CommandLine
@@ -44,16 +40,68 @@ with InitRelativeImports():
 
 
 # ----------------------------------------------------------------------
-# |  Load the input parsers
-InputParserInfo                             = namedtuple(
-    "InputParserInfo",
-    [
-        "Mod",
-        "DeserializeFunc",
-    ],
-)
+class InputParserInfo(object):
+    """\
+    Information about an input parser.
+
+    The parser's generated module is loaded on first use rather than when this module
+    is imported, as most invocations only process inputs of a single type.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, generated_filename):
+        self.GeneratedFilename              = generated_filename
 
-INPUT_PARSERS                               = OrderedDict()
+        self._mod                           = None
+        self._deserialize_func              = None
+
+    # ----------------------------------------------------------------------
+    @property
+    def Mod(self):
+        self.Load()
+        return self._mod
+
+    # ----------------------------------------------------------------------
+    @property
+    def DeserializeFunc(self):
+        self.Load()
+        return self._deserialize_func
+
+    # ----------------------------------------------------------------------
+    def Load(self):
+        """Loads the parser's generated module if it hasn't been loaded already"""
+
+        if self._mod is not None:
+            return
+
+        basename = os.path.splitext(os.path.basename(self.GeneratedFilename))[0]
+
+        # Load the module directly from its file rather than temporarily adding its directory
+        # to sys.path and searching for it. The module is registered under its basename (as
+        # an import would have done), which is also used to reuse a previously loaded module.
+        mod = sys.modules.get(basename, None)
+        if mod is None:
+            spec = importlib.util.spec_from_file_location(basename, self.GeneratedFilename)
+
+            mod = importlib.util.module_from_spec(spec)
+            sys.modules[basename] = mod
+
+            try:
+                spec.loader.exec_module(mod)
+            except Exception:
+                del sys.modules[basename]
+                raise
+
+        deserialize_func = getattr(mod, "Deserialize")
+        assert deserialize_func
+
+        self._mod = mod
+        self._deserialize_func = deserialize_func
+
+
+# ----------------------------------------------------------------------
+# |  Register the input parsers
+INPUT_PARSERS                               = {}
 
 for parser, file_extensions in [
     ("Json", [".json"]),
@@ -71,24 +119,20 @@ for parser, file_extensions in [
     )
     assert os.path.isfile(generated_filename), generated_filename
 
-    dirname, basename = os.path.split(generated_filename)
-    basename = os.path.splitext(basename)[0]
+    INPUT_PARSERS[tuple(file_extensions)] = InputParserInfo(generated_filename)
 
-    sys.path.insert(0, dirname)
-    with CallOnExit(lambda: sys.path.pop(0)):
-        mod = importlib.import_module(basename)
-        assert mod
-
-    deserialize_func = getattr(mod, "Deserialize")
-    assert deserialize_func
-
-    INPUT_PARSERS[tuple(file_extensions)] = InputParserInfo(mod, deserialize_func)
+# Input parsers are looked up by (lowercase) file extension for every input file
+_INPUT_PARSERS_BY_EXTENSION                 = {
+    file_extension: input_parser_info
+    for file_extensions, input_parser_info in INPUT_PARSERS.items()
+    for file_extension in file_extensions
+}
 
 
 # ----------------------------------------------------------------------
 PLUGINS                                     = GeneratorFactory.CreatePluginMap("DEVELOPMENT_ENVIRONMENT_HTTP_GENERATOR_PLUGINS", os.path.join(_script_dir, "Plugins"), sys.stdout)
 
-_PluginTypeInfo                             = CommandLine.EnumTypeInfo(list(six.iterkeys(PLUGINS)))
+_PluginTypeInfo                             = CommandLine.EnumTypeInfo(list(PLUGINS.keys()))
 
 # ----------------------------------------------------------------------
 def _GetOptionalMetadata(*args, **kwargs):
@@ -107,8 +151,10 @@ CodeGenerator                               = GeneratorFactory.CodeGeneratorFact
     PLUGINS,
     "HttpGenerator",
     __doc__.replace("\n", ""),
-    r".+({})".format(
-        "|".join(itertools.chain(*INPUT_PARSERS.keys()))
+    # Extensions are escaped (so that '.' isn't a wildcard), anchored to the end of the
+    # filename, and matched without regard to case (as they are when inputs are parsed).
+    r".+((?i:{}))$".format(
+        "|".join(re.escape(ext) for ext in itertools.chain.from_iterable(INPUT_PARSERS.keys()))
     ),
     _GetOptionalMetadata,
     _CreateContext,
@@ -225,7 +271,7 @@ def CommandLineSuffix():
 
         """,
     ).format(
-        "\n".join(["    - {0:<30}  {1}".format("{}:".format(pi.Plugin.Name), pi.Plugin.Description) for pi in six.itervalues(PLUGINS)])
+        "\n".join(["    - {0:<30}  {1}".format("{}:".format(pi.Plugin.Name), pi.Plugin.Description) for pi in PLUGINS.values()])
     )
 
 
@@ -246,83 +292,59 @@ def __GetOptionalMetadata():
 def __CreateContext(context, plugin):
 
     # Read all the endpoint info
-    roots = OrderedDict()
+    roots = {}
 
     for input_filename in context["inputs"]:
-        ext = os.path.splitext(input_filename)[1]
-
-        for extensions, input_parser_info in six.iteritems(INPUT_PARSERS):
-            if ext not in extensions:
-                continue
-
-            try:
-                root = input_parser_info.DeserializeFunc(
-                    input_filename,
-                    always_include_optional=True,
-                )
-
-                roots[input_filename] = root
-                break
-
-            except Exception as ex:
-                # Augment the exception with stack information
-                args = list(ex.args)
-
-                args[0] = textwrap.dedent(
-                    """\
-                    {}
-
-                    {}
-                    [{}]
-                    """,
-                ).format(
-                    args[0],
-                    input_filename,
-                    " > ".join(getattr(ex, "stack", [])),
-                )
-
-                ex.args = tuple(args)
-                raise ex from None
+        root = __DeserializeInputFile(input_filename)
+        if root is not None:
+            roots[input_filename] = root
 
     # Validate the endpoint info
     endpoint_stack = []
 
+    uri_parameter_findall = Plugin.URI_PARAMETER_FINDALL
+
     # ----------------------------------------------------------------------
-    def Validate(input_filename, endpoint):
+    def Validate(input_filename, endpoint, parent_variable_names):
         nonlocal endpoint_stack
 
         endpoint_stack.append(endpoint)
         with CallOnExit(endpoint_stack.pop):
             try:
                 # Ensure that all parameters in the uri are defined in variables and vice versa
-                uri_variables = set()
+                # The regex has a single group, so findall returns the names without creating
+                # match objects.
+                uri_variable_names = uri_parameter_findall(endpoint.uri)
+                uri_variables = set(uri_variable_names)
 
-                for match in Plugin.URI_PARAMETER_REGEX.finditer(endpoint.uri):
-                    name = match.group("name")
+                if len(uri_variables) != len(uri_variable_names):
+                    uri_variables.clear()
 
-                    if name in uri_variables:
-                        raise Exception("The uri variable '{}' has already been defined".format(name))
+                    for name in uri_variable_names:
+                        if name in uri_variables:
+                            raise Exception("The uri variable '{}' has already been defined".format(name))
 
-                    uri_variables.add(name)
+                        uri_variables.add(name)
 
-                for variable in endpoint.variables:
-                    if variable.name not in uri_variables:
-                        raise Exception("The uri variable '{}' was not found in the uri '{}'".format(variable.name, endpoint.uri))
+                variable_names = [variable.name for variable in endpoint.variables]
+                variables = set(variable_names)
 
-                    uri_variables.remove(variable.name)
+                if not variables.issubset(uri_variables):
+                    for name in variable_names:
+                        if name not in uri_variables:
+                            raise Exception("The uri variable '{}' was not found in the uri '{}'".format(name, endpoint.uri))
 
-                if uri_variables:
-                    raise Exception("The uri variables {} were not defined".format(", ".join(["'{}'".format(variable) for variable in uri_variables])))
+                if not uri_variables.issubset(variables):
+                    raise Exception("The uri variables {} were not defined".format(", ".join(["'{}'".format(name) for name in uri_variable_names if name not in variables])))
 
-                # Ensure that the uri variables don't overlap with parent variables
-                all_variables = set()
+                # Ensure that the uri variables don't overlap with parent variables (or each other)
+                all_variable_names = set(parent_variable_names)
 
-                for e in endpoint_stack:
-                    for variable in e.variables:
-                        if variable.name in all_variables:
-                            raise Exception("The variable '{}' has already been defined".format(variable.name))
+                for name in variable_names:
+                    if name in all_variable_names:
+                        raise Exception("The variable '{}' has already been defined".format(name))
 
-                        all_variables.add(variable.name)
+                    all_variable_names.add(name)
 
                 # Handle content that is mutually exclusive
                 for method in endpoint.methods:
@@ -333,9 +355,9 @@ def __CreateContext(context, plugin):
                         if response.default_content and response.contents:
                             raise Exception("'default_content' and 'contents' are mutually exclusive and cannot both be provided ({}, {})".format(method.verb, response.code))
 
-                    # Validate the children
-                    for child in endpoint.children:
-                        Validate(input_filename, child)
+                # Validate the children
+                for child in endpoint.children:
+                    Validate(input_filename, child, all_variable_names)
 
             except Exception as ex:
                 # Augment the exception with stack information
@@ -359,9 +381,9 @@ def __CreateContext(context, plugin):
 
     # ----------------------------------------------------------------------
 
-    for input_filename, root in six.iteritems(roots):
+    for input_filename, root in roots.items():
         for endpoint in root.endpoints:
-            Validate(input_filename, endpoint)
+            Validate(input_filename, endpoint, set())
 
     # Filter the content
     if (
@@ -370,91 +392,99 @@ def __CreateContext(context, plugin):
         or context["verb_includes"]
         or context["verb_excludes"]
     ):
+        # The predicate invoked with requests and response contents is selected once based on the
+        # filters provided; None indicates that content types are not filtered at all. Each pattern
+        # is compiled on its own, as patterns with global flags, named groups, or backreferences
+        # cannot be combined into a single alternation.
+        if context["content_type_includes"]:
+            content_type_include_regexes = [re.compile(pattern) for pattern in context["content_type_includes"]]
+            content_type_include_func = lambda content_type: any(regex.match(content_type) for regex in content_type_include_regexes)
+        else:
+            content_type_include_func = None
+
         if context["content_type_excludes"]:
-            content_type_excludes_regexes = [re.compile(value) for value in context["content_type_excludes"]]
-            content_type_exclude_func = lambda rar: any(regex for regex in content_type_excludes_regexes if regex.match(rar.content_type))
+            content_type_exclude_regexes = [re.compile(pattern) for pattern in context["content_type_excludes"]]
+            content_type_exclude_func = lambda content_type: any(regex.match(content_type) for regex in content_type_exclude_regexes)
         else:
-            content_type_exclude_func = lambda rar: False
+            content_type_exclude_func = None
 
-        if context["content_type_includes"]:
-            content_type_include_regexes = [re.compile(value) for value in context["content_type_includes"]]
-            content_type_include_func = lambda rar: any(regex for regex in content_type_include_regexes if regex.match(rar.content_type))
+        if content_type_include_func is not None and content_type_exclude_func is not None:
+            # ----------------------------------------------------------------------
+            def IsContentIncluded(content):
+                content_type = content.content_type
+
+                return (
+                    not content_type_exclude_func(content_type)
+                    and content_type_include_func(content_type)
+                )
+
+            # ----------------------------------------------------------------------
+
+        elif content_type_include_func is not None:
+            IsContentIncluded = lambda content: content_type_include_func(content.content_type)
+        elif content_type_exclude_func is not None:
+            IsContentIncluded = lambda content: not content_type_exclude_func(content.content_type)
         else:
-            content_type_include_func = lambda rar: True
+            IsContentIncluded = None
 
         verb_includes = set([value.upper() for value in context["verb_includes"]])
         verb_excludes = set([value.upper() for value in context["verb_excludes"]])
 
+        # ----------------------------------------------------------------------
+        def IsVerbIncluded(verb):
+            verb = verb.upper()
+
+            return (
+                verb not in verb_excludes
+                and (not verb_includes or verb in verb_includes)
+            )
+
         # ----------------------------------------------------------------------
         def Filter(endpoint):
-            method_index = 0
-            while method_index < len(endpoint.methods):
-                method = endpoint.methods[method_index]
-
-                # Process the requests
-                request_index = 0
-                while request_index < len(method.requests):
-                    if (
-                        content_type_exclude_func(method.requests[request_index].content_type)
-                        or not content_type_include_func(method.request[request_index].content_type)
-                    ):
-                        del method.requests[request_index]
-                    else:
-                        request_index += 1
-
-                # Process the responses
-                response_index = 0
-                while response_index < len(method.responses):
-                    response = method.responses[response_index]
-
-                    content_index = 0
-                    while content_index < len(response.contents):
-                        if (
-                            content_type_exclude_func(response.contents[content_index].content_type)
-                            or not content_type_include_func(response.contents[content_index].content_type)
-                        ):
-                            del response.responses[content_index]
-                        else:
-                            content_index += 1
-
-                    if not response.default_content and not response.contents:
-                        del method.responses[response_index]
-                    else:
-                        response_index += 1
-
-                if (
-                    not method.default_request
-                    and not method.requests
-                    and not method.responses
-                ):
-                    del endpoint.methods[method_index]
-                else:
-                    method_index += 1
-
-            child_index = 0
-            while child_index < len(endpoint.children):
-                child = endpoint.children[child_index]
+            # Items are filtered by building new lists (rather than deleting items one at a time)
+            endpoint.methods[:] = [method for method in endpoint.methods if IsVerbIncluded(method.verb)]
+
+            for method in endpoint.methods:
+                if IsContentIncluded is not None:
+                    # Process the requests
+                    method.requests[:] = list(filter(IsContentIncluded, method.requests))
 
+                    # Process the responses
+                    for response in method.responses:
+                        response.contents[:] = list(filter(IsContentIncluded, response.contents))
+
+                method.responses[:] = [
+                    response
+                    for response in method.responses
+                    if response.default_content or response.contents
+                ]
+
+            endpoint.methods[:] = [
+                method
+                for method in endpoint.methods
+                if method.default_request or method.requests or method.responses
+            ]
+
+            for child in endpoint.children:
                 Filter(child)
 
-                if not child.methods and not child.children:
-                    del endpoint.children[child_index]
-                else:
-                    child_index += 1
+            endpoint.children[:] = [
+                child
+                for child in endpoint.children
+                if child.methods or child.children
+            ]
 
         # ----------------------------------------------------------------------
 
-        for input_filename, root in list(six.iteritems(roots)):
-            endpoint_index = 0
-            while endpoint_index < len(root.endpoints):
-                endpoint = root.endpoints[endpoint_index]
-
+        for input_filename, root in list(roots.items()):
+            for endpoint in root.endpoints:
                 Filter(endpoint)
 
-                if not root.endpoint.methods and not endpoint.children:
-                    del root.endpoints[endpoint_index]
-                else:
-                    endpoint_index += 1
+            root.endpoints[:] = [
+                endpoint
+                for endpoint in root.endpoints
+                if endpoint.methods or endpoint.children
+            ]
 
             if not root.endpoints:
                 del roots[input_filename]
@@ -464,12 +494,23 @@ def __CreateContext(context, plugin):
     # a new generation is required. To make this work as expected, we need to
     # compare the data within the endpoints and not the endpoints themselves.
 
-    context["persisted_roots"] = yaml.dump(roots)
+    # The YAML content must be the same for the same data in every process, so keys (and set
+    # items) are sorted. The roots are persisted as a list of pairs to maintain the order of
+    # the inputs.
+    context["persisted_roots"] = yaml.dump([[input_filename, root] for input_filename, root in roots.items()])
 
     return context
 
 
 # ----------------------------------------------------------------------
+_UNIQUE_NAME_TRANSLATION_TABLE              = str.maketrans(
+    {
+        "/": ".",
+        "{": "__",
+        "}": "__",
+    },
+)
+
 def __Invoke(
     code_generator,
     invoke_reason,
@@ -479,26 +520,37 @@ def __Invoke(
     verbose,
     plugin,
 ):
-    roots = yaml.load(
-        context["persisted_roots"],
-        Loader=yaml.FullLoader,
+    # The persisted roots contain types defined by the parsers of the input files
+    for input_filename in context["inputs"]:
+        input_parser_info = __GetInputParserInfo(input_filename)
+        if input_parser_info is not None:
+            input_parser_info.Load()
+
+    roots = dict(
+        yaml.load(
+            context["persisted_roots"],
+            Loader=yaml.Loader,
+        ),
     )
 
     # ----------------------------------------------------------------------
-    def Postprocess(endpoint, uris):
-        uris.append(endpoint.uri)
-        with CallOnExit(uris.pop):
-            endpoint.full_uri = ''.join(uris).replace("//", "/")
-            endpoint.unique_name = endpoint.full_uri.replace("/", ".").replace("{", "__").replace("}", "__")
+    def Postprocess(endpoint, parent_uri):
+        # The ancestors' concatenated uri is extended rather than joining the uris of all
+        # ancestors for every endpoint. It is passed to the children before double slashes are
+        # replaced, so runs of 3 or more slashes produce the same result as the joined uris.
+        uri = parent_uri + endpoint.uri
 
-            for child in endpoint.children:
-                Postprocess(child, uris)
+        endpoint.full_uri = uri.replace("//", "/")
+        endpoint.unique_name = endpoint.full_uri.translate(_UNIQUE_NAME_TRANSLATION_TABLE)
+
+        for child in endpoint.children:
+            Postprocess(child, uri)
 
     # ----------------------------------------------------------------------
 
-    for root in six.itervalues(roots):
+    for root in roots.values():
         for endpoint in root.endpoints:
-            Postprocess(endpoint, [])
+            Postprocess(endpoint, "")
 
     return plugin.Generate(
         code_generator,
@@ -512,6 +564,51 @@ def __Invoke(
     )
 
 
+# ----------------------------------------------------------------------
+def __GetInputParserInfo(input_filename):
+    """Returns the InputParserInfo for the input file, or None if the file isn't a supported input type"""
+
+    return _INPUT_PARSERS_BY_EXTENSION.get(
+        os.path.splitext(input_filename)[1].lower(),
+        None,
+    )
+
+
+# ----------------------------------------------------------------------
+def __DeserializeInputFile(input_filename):
+    """Returns the root deserialized from the input file, or None if the file isn't a supported input type"""
+
+    input_parser_info = __GetInputParserInfo(input_filename)
+    if input_parser_info is None:
+        return None
+
+    try:
+        return input_parser_info.DeserializeFunc(
+            input_filename,
+            always_include_optional=True,
+        )
+
+    except Exception as ex:
+        # Augment the exception with stack information
+        args = list(ex.args)
+
+        args[0] = textwrap.dedent(
+            """\
+            {}
+
+            {}
+            [{}]
+            """,
+        ).format(
+            args[0],
+            input_filename,
+            " > ".join(getattr(ex, "stack", [])),
+        )
+
+        ex.args = tuple(args)
+        raise ex from None
+
+
 # ----------------------------------------------------------------------
 # ----------------------------------------------------------------------
 # ----------------------------------------------------------------------